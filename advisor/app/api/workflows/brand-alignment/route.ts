@@ -462,6 +462,7 @@ const logoDetectionStep = createStep({
       brandContext: inputData.brandContext,
       preferClip: true,
       useGeminiFallback: true,
+      includeCropImage: true,
     };
 
     console.log("Logo detection request payload:", JSON.stringify({
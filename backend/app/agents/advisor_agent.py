@@ -16,15 +16,24 @@ It generates a comprehensive report with:
 
 from __future__ import annotations
 
+import copy
+import hashlib
 import json
 import logging
 import os
-from typing import Any, Dict
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from google.genai.types import GenerateContentResponse
 
-from ..schemas.critique import AdvisorRequest, AdvisorResult
-from ..services.gemini import get_genai_client
+from ..schemas.critique import (
+    AdvisorBatchReport,
+    AdvisorReport,
+    AdvisorRequest,
+    AdvisorResult,
+)
+from ..services.gemini import dump_json_compact, get_genai_client, json_loads
 
 logger = logging.getLogger(__name__)
 
@@ -37,128 +46,400 @@ USE_DUMMY_ADVISOR = os.getenv("USE_DUMMY_ADVISOR", "false").lower() in {
 }
 
 
+# Neutral report used when the model returns nothing usable. Callers get a
+# shallow copy; the empty nested containers are never mutated.
+_FALLBACK_ADVISOR_REPORT: Dict[str, Any] = {
+    "brandAlignment": 0.5,
+    "visualQuality": 0.5,
+    "toneAccuracy": 0.5,
+    "violations": [],
+    "offBrandElements": [],
+    "comprehensiveReport": "",
+    "justifications": {},
+    "validationPrompt": "",
+}
+
+
+# Dummy-mode report shared across calls; only the brand-specific summary is
+# filled in per request, and the nested values are never mutated.
+_DUMMY_ADVISOR_REPORT_TEMPLATE: Dict[str, Any] = {
+    "brandAlignment": 0.5,
+    "visualQuality": 0.5,
+    "toneAccuracy": 0.5,
+    "violations": [],
+    "offBrandElements": [],
+    "comprehensiveReport": "",
+    "justifications": {
+        "brandAlignment": "Dummy mode - not calculated",
+        "visualQuality": "Dummy mode - not calculated",
+        "toneAccuracy": "Dummy mode - not calculated",
+    },
+    "validationPrompt": (
+        "Dummy validation prompt. Disable USE_DUMMY_ADVISOR to generate real prompt."
+    ),
+}
+
+
+# Exact-match cache of parsed advisor reports keyed on a hash of the request
+# content. Set ADVISOR_CACHE_SIZE=0 to disable it.
+ADVISOR_CACHE_SIZE = int(os.getenv("ADVISOR_CACHE_SIZE", "128"))
+
+# Per-report character budget for the upstream reports embedded in the prompt
+# (roughly four characters per token).
+MAX_REPORT_CHARS = int(os.getenv("ADVISOR_MAX_REPORT_CHARS", "6000"))
+
+# String truncation limits tried in turn until a report fits its budget.
+_STRING_LIMITS = (500, 200, 80)
+
+_report_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_report_cache_lock = threading.Lock()
+
+
+def _cache_key(request: AdvisorRequest) -> str:
+    """Hash the inputs that determine the advisor prompt."""
+    payload = [
+        request.brand_alignment_report,
+        request.synthesizer_report,
+        request.safety_ethics_report,
+        request.message_clarity_report,
+        request.original_prompt or "",
+        request.brand_context.model_dump(),
+    ]
+    data = dump_json_compact(payload, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _get_cached_report(key: str) -> Optional[Dict[str, Any]]:
+    with _report_cache_lock:
+        report = _report_cache.get(key)
+        if report is None:
+            return None
+        _report_cache.move_to_end(key)
+    return copy.deepcopy(report)
+
+
+def _store_cached_report(key: str, report: Dict[str, Any]) -> None:
+    with _report_cache_lock:
+        _report_cache[key] = copy.deepcopy(report)
+        _report_cache.move_to_end(key)
+        while len(_report_cache) > ADVISOR_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+
+
 def _extract_response_text(response: GenerateContentResponse) -> str:
     """
     Attempt to extract textual payload from a Gemini response.
-    """
-    text_parts = []
 
-    if hasattr(response, "text") and response.text:
-        text_parts.append(response.text)
-    elif hasattr(response, "candidates") and response.candidates:
-        for candidate in response.candidates:
-            if hasattr(candidate, "content") and hasattr(candidate.content, "parts"):
-                for part in candidate.content.parts:
-                    if hasattr(part, "text") and part.text:
-                        text_parts.append(part.text)
+    ``response.text`` covers the common case; otherwise the candidate parts
+    are walked once. Objects without the expected shape yield "".
+    """
+    try:
+        text = response.text
+        if text:
+            return text
+        return "".join(
+            part.text
+            for candidate in response.candidates or ()
+            if candidate.content
+            for part in candidate.content.parts or ()
+            if part.text
+        )
+    except AttributeError:
+        return ""
 
-    return "".join(text_parts)
 
+class _RootObjectScanner:
+    """
+    Track brace depth across streamed chunks to spot where the root JSON
+    object closes. Braces inside string literals are ignored.
+    """
 
-def _parse_json_response(text: str) -> Dict[str, Any]:
+    __slots__ = ("depth", "in_string", "escaped")
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: str) -> int:
+        """Return the index in ``chunk`` closing the root object, or -1."""
+        for index, char in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                # Quotes in any preamble before the object are plain prose.
+                self.in_string = self.depth > 0
+            elif char == "{":
+                self.depth += 1
+            elif char == "}" and self.depth:
+                self.depth -= 1
+                if self.depth == 0:
+                    return index
+        return -1
+
+
+def _collect_streamed_json(stream: Iterable[GenerateContentResponse]) -> str:
     """
-    Extract JSON from a model response, handling markdown code blocks.
+    Accumulate streamed response text until the root JSON object closes.
+
+    Anything the model emits after the object (closing fences, commentary)
+    is not waited for; the stream is closed as soon as the object is complete.
     """
-    if not text:
-        return {
-            "brandAlignment": 0.5,
-            "visualQuality": 0.5,
-            "toneAccuracy": 0.5,
-            "violations": [],
-            "offBrandElements": [],
-            "comprehensiveReport": "",
-            "justifications": {},
-            "validationPrompt": "",
-        }
+    scanner = _RootObjectScanner()
+    fragments: List[str] = []
 
-    import re  # local import to avoid module-level dependency
+    try:
+        for chunk in stream:
+            text = _extract_response_text(chunk)
+            if not text:
+                continue
+            end = scanner.feed(text)
+            if end != -1:
+                fragments.append(text[: end + 1])
+                break
+            fragments.append(text)
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+    return "".join(fragments)
 
-    json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.DOTALL)
-    if json_match:
-        text = json_match.group(1)
 
-    json_match = re.search(r"\{.*\}", text, re.DOTALL)
-    if json_match:
-        text = json_match.group(0)
+def _parse_json_response(text: str) -> Dict[str, Any]:
+    """
+    Parse the advisor report from a JSON-mode model response.
+
+    The request sets ``response_mime_type="application/json"``, so the body is
+    the JSON document itself; anything else falls back to a neutral report.
+    """
+    if not text:
+        return _FALLBACK_ADVISOR_REPORT.copy()
 
     try:
-        return json.loads(text)
+        return json_loads(text)
     except json.JSONDecodeError:
         logger.warning("Advisor received non-JSON response, returning fallback structure")
+        report = _FALLBACK_ADVISOR_REPORT.copy()
+        report["comprehensiveReport"] = text.strip()
+        return report
+
+
+def _is_noise_key(key: Any) -> bool:
+    """Raw model output and debug payloads add tokens without adding signal."""
+    if not isinstance(key, str):
+        return False
+    lowered = key.lower()
+    return lowered == "debug" or lowered.startswith("raw")
+
+
+def _compact_value(value: Any, max_string_chars: int) -> Any:
+    if isinstance(value, dict):
         return {
-            "brandAlignment": 0.5,
-            "visualQuality": 0.5,
-            "toneAccuracy": 0.5,
-            "violations": [],
-            "offBrandElements": [],
-            "comprehensiveReport": text.strip(),
-            "justifications": {},
-            "validationPrompt": "",
+            key: _compact_value(item, max_string_chars)
+            for key, item in value.items()
+            if not _is_noise_key(key)
         }
+    if isinstance(value, list):
+        return [_compact_value(item, max_string_chars) for item in value]
+    if isinstance(value, str) and len(value) > max_string_chars:
+        return value[:max_string_chars] + "…"
+    return value
 
 
-def _build_prompt(request: AdvisorRequest) -> str:
-    """Construct the prompt for the advisor agent."""
+def _compact_report(report: Dict[str, Any], max_chars: int = MAX_REPORT_CHARS) -> str:
+    """
+    Serialize an upstream report for the prompt, trimming it to a size budget.
+
+    Raw/debug keys are dropped and long strings truncated, with the string
+    limit tightened until the report fits ``max_chars``. A report that only
+    holds raw text (the upstream parse failed) keeps it, since it is all the
+    advisor has to go on.
+    """
+    kept = {key: value for key, value in report.items() if not _is_noise_key(key)}
+    source = kept or report
+
+    for max_string_chars in _STRING_LIMITS:
+        compacted = {
+            key: _compact_value(value, max_string_chars)
+            for key, value in source.items()
+        }
+        text = dump_json_compact(compacted)
+        if len(text) <= max_chars:
+            return text
+
+    logger.debug("Advisor input report exceeds %d chars after compaction; cutting", max_chars)
+    return text[:max_chars] + "…"
+
+
+_PROMPT_HEADER = (
+    "You are the AdVisor agent, the final aggregator in a multi-agent brand quality workflow. "
+    "You receive comprehensive analysis from multiple specialized agents and must synthesize "
+    "their findings into a final, actionable report.\n\n"
+)
+
+_BATCH_PROMPT_HEADER = _PROMPT_HEADER + (
+    "This request contains several independent advertisements, each introduced by an "
+    "AD marker with a numeric id. Evaluate every advertisement on its own; findings for "
+    "one ad must not influence another.\n\n"
+)
+
+_REPORT_SCHEMA = (
+    "{\n"
+    '  "brandAlignment": number (0-1),\n'
+    '  "visualQuality": number (0-1),\n'
+    '  "toneAccuracy": number (0-1),\n'
+    '  "violations": ["string"],\n'
+    '  "offBrandElements": ["string"],\n'
+    '  "comprehensiveReport": "string",\n'
+    '  "justifications": {\n'
+    '    "brandAlignment": "string",\n'
+    '    "visualQuality": "string",\n'
+    '    "toneAccuracy": "string"\n'
+    "  },\n"
+    '  "validationPrompt": "string"\n'
+    "}\n\n"
+)
+
+_REPORT_REQUIREMENTS = (
+    "Requirements:\n"
+    "1. Extract and synthesize scores from all reports to provide:\n"
+    "   - brandAlignment: Overall brand alignment score (0-1)\n"
+    "   - visualQuality: Visual quality score (0-1)\n"
+    "   - toneAccuracy: Tone accuracy score (0-1)\n"
+    "2. Compile all violations from safety/ethics and brand alignment reports\n"
+    "3. List all off-brand elements identified across all agents\n"
+    "4. Write a comprehensive report that summarizes all findings\n"
+    "5. Provide justifications for each score\n"
+    "6. Generate a validationPrompt that should be appended to the original prompt. "
+    "This prompt should include specific instructions to address any issues found, "
+    "improve scores, and ensure compliance. Format it as clear, actionable instructions "
+    "that can be directly appended to the original video generation prompt.\n\n"
+    "The validationPrompt is critical - it should be specific, actionable, and address "
+    "all identified issues while maintaining the original creative intent."
+)
+
+_PROMPT_FOOTER = (
+    "Based on all these reports, generate a comprehensive final report with the following structure:\n"
+    + _REPORT_SCHEMA
+    + _REPORT_REQUIREMENTS
+)
+
+_BATCH_PROMPT_FOOTER = (
+    "Based on these reports, generate one final report per advertisement. Respond with a "
+    "JSON array containing one object per ad. Each object must include an \"id\" field "
+    "matching the ad id above, plus every field of the following structure:\n"
+    + _REPORT_SCHEMA
+    + _REPORT_REQUIREMENTS
+)
+
+
+def _build_report_section(request: AdvisorRequest) -> List[str]:
+    """Return the prompt fragments describing one request's brand and reports."""
     brand = request.brand_context
-    company = brand.company_name
-    product = brand.product_name
     brief = brand.brief_prompt or ""
 
-    synthesizer_report_str = json.dumps(request.synthesizer_report, indent=2)
-    safety_ethics_report_str = json.dumps(request.safety_ethics_report, indent=2)
-    message_clarity_report_str = json.dumps(request.message_clarity_report, indent=2)
-    brand_alignment_report_str = json.dumps(request.brand_alignment_report, indent=2)
-    original_prompt_section = (
-        f"\n\nORIGINAL PROMPT USED TO GENERATE THE VIDEO:\n{request.original_prompt}\n"
-        if request.original_prompt
-        else ""
-    )
+    parts = [
+        "Brand Context:\n- Company: ",
+        brand.company_name,
+        "\n- Product: ",
+        brand.product_name,
+        "\n",
+        f"- Creative brief: {brief}" if brief else "",
+        "\n\nYou have received analysis from the following agents:\n\n"
+        "1. BRAND ALIGNMENT WORKFLOW REPORT:\n",
+        _compact_report(request.brand_alignment_report),
+        "\n\n2. SYNTHESIZER REPORT (aggregated brand alignment insights):\n",
+        _compact_report(request.synthesizer_report),
+        "\n\n3. SAFETY AND ETHICS REPORT:\n",
+        _compact_report(request.safety_ethics_report),
+        "\n\n4. MESSAGE CLARITY REPORT:\n",
+        _compact_report(request.message_clarity_report),
+        "\n",
+    ]
+    if request.original_prompt:
+        parts.extend(
+            (
+                "\n\nORIGINAL PROMPT USED TO GENERATE THE VIDEO:\n",
+                request.original_prompt,
+                "\n",
+            )
+        )
+    return parts
+
+
+def _build_prompt(request: AdvisorRequest) -> str:
+    """
+    Construct the prompt for the advisor agent.
+
+    The instructions and output schema are static, so they live in module
+    constants and only the brand fields and reports are joined in per call.
+    """
+    return "".join([_PROMPT_HEADER, *_build_report_section(request), _PROMPT_FOOTER])
 
-    return (
-        "You are the AdVisor agent, the final aggregator in a multi-agent brand quality workflow. "
-        "You receive comprehensive analysis from multiple specialized agents and must synthesize "
-        "their findings into a final, actionable report.\n\n"
-        f"Brand Context:\n- Company: {company}\n- Product: {product}\n"
-        f"{'- Creative brief: ' + brief if brief else ''}\n\n"
-        "You have received analysis from the following agents:\n\n"
-        "1. BRAND ALIGNMENT WORKFLOW REPORT:\n"
-        f"{brand_alignment_report_str}\n\n"
-        "2. SYNTHESIZER REPORT (aggregated brand alignment insights):\n"
-        f"{synthesizer_report_str}\n\n"
-        "3. SAFETY AND ETHICS REPORT:\n"
-        f"{safety_ethics_report_str}\n\n"
-        "4. MESSAGE CLARITY REPORT:\n"
-        f"{message_clarity_report_str}\n{original_prompt_section}"
-        "Based on all these reports, generate a comprehensive final report with the following structure:\n"
-        "{\n"
-        '  "brandAlignment": number (0-1),\n'
-        '  "visualQuality": number (0-1),\n'
-        '  "toneAccuracy": number (0-1),\n'
-        '  "violations": ["string"],\n'
-        '  "offBrandElements": ["string"],\n'
-        '  "comprehensiveReport": "string",\n'
-        '  "justifications": {\n'
-        '    "brandAlignment": "string",\n'
-        '    "visualQuality": "string",\n'
-        '    "toneAccuracy": "string"\n'
-        "  },\n"
-        '  "validationPrompt": "string"\n'
-        "}\n\n"
-        "Requirements:\n"
-        "1. Extract and synthesize scores from all reports to provide:\n"
-        "   - brandAlignment: Overall brand alignment score (0-1)\n"
-        "   - visualQuality: Visual quality score (0-1)\n"
-        "   - toneAccuracy: Tone accuracy score (0-1)\n"
-        "2. Compile all violations from safety/ethics and brand alignment reports\n"
-        "3. List all off-brand elements identified across all agents\n"
-        "4. Write a comprehensive report that summarizes all findings\n"
-        "5. Provide justifications for each score\n"
-        "6. Generate a validationPrompt that should be appended to the original prompt. "
-        "This prompt should include specific instructions to address any issues found, "
-        "improve scores, and ensure compliance. Format it as clear, actionable instructions "
-        "that can be directly appended to the original video generation prompt.\n\n"
-        "The validationPrompt is critical - it should be specific, actionable, and address "
-        "all identified issues while maintaining the original creative intent."
+
+def _build_batch_prompt(items: List[Tuple[int, AdvisorRequest]]) -> str:
+    """Row-marshal several advisor requests into a single prompt."""
+    parts = [_BATCH_PROMPT_HEADER]
+    for item_id, request in items:
+        parts.append(f"=== AD id={item_id} ===\n")
+        parts.extend(_build_report_section(request))
+        parts.append("\n")
+    parts.append(_BATCH_PROMPT_FOOTER)
+    return "".join(parts)
+
+
+def _parse_json_array_response(text: str) -> Dict[int, Dict[str, Any]]:
+    """
+    Parse the JSON array of per-ad reports and index it by ad id.
+
+    Entries without a usable id are dropped; callers fall back to single
+    requests for any id missing from the result.
+    """
+    if not text:
+        logger.warning("Advisor batch response was empty")
+        return {}
+
+    try:
+        items = json_loads(text)
+    except json.JSONDecodeError:
+        logger.warning("Advisor batch response was not valid JSON")
+        return {}
+
+    reports: Dict[int, Dict[str, Any]] = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            item_id = int(item.pop("id"))
+        except (KeyError, TypeError, ValueError):
+            continue
+        reports[item_id] = item
+    return reports
+
+
+def _build_result(
+    report: Dict[str, Any], prompt: str, warnings: List[str]
+) -> AdvisorResult:
+    """Wrap a parsed report, filling in the validation prompt when missing."""
+    validation_prompt = report.get("validationPrompt", "")
+    if not validation_prompt:
+        logger.warning("Advisor report did not include validationPrompt, generating fallback")
+        validation_prompt = (
+            "Please ensure the video adheres to brand guidelines, maintains high visual quality, "
+            "and accurately represents the product and messaging."
+        )
+
+    return AdvisorResult(
+        report=report,
+        prompt=prompt,
+        validation_prompt=validation_prompt,
+        warnings=warnings,
     )
 
 
@@ -169,23 +450,11 @@ def run_advisor_agent(request: AdvisorRequest) -> AdvisorResult:
         brand_description = f"{brand.company_name}'s {brand.product_name}".strip()
 
         report = {
-            "brandAlignment": 0.5,
-            "visualQuality": 0.5,
-            "toneAccuracy": 0.5,
-            "violations": [],
-            "offBrandElements": [],
+            **_DUMMY_ADVISOR_REPORT_TEMPLATE,
             "comprehensiveReport": (
                 f"Dummy advisor report for {brand_description}. "
                 "Real aggregation skipped to save credits."
             ),
-            "justifications": {
-                "brandAlignment": "Dummy mode - not calculated",
-                "visualQuality": "Dummy mode - not calculated",
-                "toneAccuracy": "Dummy mode - not calculated",
-            },
-            "validationPrompt": (
-                "Dummy validation prompt. Disable USE_DUMMY_ADVISOR to generate real prompt."
-            ),
         }
 
         return AdvisorResult(
@@ -200,40 +469,112 @@ def run_advisor_agent(request: AdvisorRequest) -> AdvisorResult:
     client = get_genai_client()
 
     prompt = _build_prompt(request)
-    logger.info("Generating comprehensive advisor report with Gemini...")
-
-    response = client.models.generate_content(
-        model="gemini-2.0-flash-exp",
-        contents=[
-            {
-                "role": "user",
-                "parts": [
-                    {
-                        "text": prompt,
-                    }
-                ],
-            }
-        ],
-    )
+    warnings: List[str] = []
+
+    cache_key = _cache_key(request) if ADVISOR_CACHE_SIZE > 0 else None
+    report = _get_cached_report(cache_key) if cache_key else None
+
+    if report is not None:
+        logger.info("Advisor report served from cache")
+        warnings.append("Advisor report served from cache; Gemini call skipped.")
+    else:
+        logger.info("Generating comprehensive advisor report with Gemini...")
+
+        stream = client.models.generate_content_stream(
+            model="gemini-2.0-flash-exp",
+            contents=[
+                {
+                    "role": "user",
+                    "parts": [
+                        {
+                            "text": prompt,
+                        }
+                    ],
+                }
+            ],
+            config={
+                "response_mime_type": "application/json",
+                "response_schema": AdvisorReport,
+            },
+        )
 
-    response_text = _extract_response_text(response)
-    logger.debug("Advisor raw response length: %d", len(response_text))
+        response_text = _collect_streamed_json(stream)
+        logger.debug("Advisor raw response length: %d", len(response_text))
 
-    report = _parse_json_response(response_text)
-    
-    # Ensure validationPrompt exists in the report
-    validation_prompt = report.get("validationPrompt", "")
-    if not validation_prompt:
-        logger.warning("Advisor report did not include validationPrompt, generating fallback")
-        validation_prompt = (
-            "Please ensure the video adheres to brand guidelines, maintains high visual quality, "
-            "and accurately represents the product and messaging."
-        )
+        report = _parse_json_response(response_text)
 
-    return AdvisorResult(
-        report=report,
-        prompt=prompt,
-        validation_prompt=validation_prompt,
-        warnings=[],
-    )
+        # Only cache well-formed reports so a bad response can be retried.
+        if cache_key and report.get("validationPrompt"):
+            _store_cached_report(cache_key, report)
+
+    return _build_result(report, prompt, warnings)
+
+
+def run_advisor_agent_batch(
+    requests: List[AdvisorRequest], batch_size: int = 8
+) -> List[AdvisorResult]:
+    """
+    Execute the advisor agent for several ads, sharing Gemini calls.
+
+    Up to ``batch_size`` requests are marshalled into one prompt whose response
+    is a JSON array keyed by ad id. Cached requests skip the batch entirely and
+    any ad missing from a batch response is retried on its own.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    if USE_DUMMY_ADVISOR or len(requests) <= 1:
+        return [run_advisor_agent(request) for request in requests]
+
+    results: List[Optional[AdvisorResult]] = [None] * len(requests)
+    cache_keys: List[Optional[str]] = [None] * len(requests)
+    pending: List[Tuple[int, AdvisorRequest]] = []
+
+    for index, request in enumerate(requests):
+        if ADVISOR_CACHE_SIZE > 0:
+            cache_keys[index] = _cache_key(request)
+            cached = _get_cached_report(cache_keys[index])
+            if cached is not None:
+                results[index] = _build_result(
+                    cached,
+                    _build_prompt(request),
+                    ["Advisor report served from cache; Gemini call skipped."],
+                )
+                continue
+        pending.append((index, request))
+
+    client = get_genai_client()
+
+    for offset in range(0, len(pending), batch_size):
+        chunk = pending[offset : offset + batch_size]
+        prompt = _build_batch_prompt(chunk)
+        logger.info("Generating %d advisor reports in one Gemini call...", len(chunk))
+
+        response = client.models.generate_content(
+            model="gemini-2.0-flash-exp",
+            contents=[{"role": "user", "parts": [{"text": prompt}]}],
+            config={
+                "response_mime_type": "application/json",
+                "response_schema": list[AdvisorBatchReport],
+            },
+        )
+        reports = _parse_json_array_response(_extract_response_text(response))
+
+        for index, request in chunk:
+            report = reports.get(index)
+            if report is None:
+                logger.warning("Advisor batch response missing ad %d, retrying alone", index)
+                results[index] = run_advisor_agent(request)
+                continue
+
+            if cache_keys[index] and report.get("validationPrompt"):
+                _store_cached_report(cache_keys[index], report)
+            results[index] = _build_result(report, _build_prompt(request), [])
+
+    # Every slot is filled by the cache, the batch or a single retry; dropping
+    # one would misalign the results with the requests
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        raise RuntimeError(f"Advisor batch produced no result for ads {missing}")
+    return results  # type: ignore[return-value]
 
@@ -9,18 +9,17 @@ Uses OpenCV for color extraction and HEX color detection.
 
 from __future__ import annotations
 
-import base64
 import json
 import logging
 import os
-import re
-from collections import Counter
-from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 from google.genai.types import GenerateContentResponse
-from sklearn.cluster import KMeans
 
 from ..schemas.critique import (
     ColorHarmonyRequest,
@@ -30,41 +29,142 @@ from ..schemas.critique import (
     ExtractedFrame,
 )
 from ..services.gemini import get_genai_client
+from ..services.media import decode_base64_image
 
 logger = logging.getLogger(__name__)
 
 
-DATA_URI_PATTERN = re.compile(r"^data:.+;base64,")
+# K-means stopping criteria: up to 20 iterations or centres moving < 1 level,
+# keeping the best of 3 k-means++ initialisations when no histogram seed is
+# available
+_KMEANS_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
+_KMEANS_ATTEMPTS = 3
 
+# Coarse color histogram used to seed K-means: 4 bits per channel gives 4096
+# buckets, small enough for the counts to stay cache-resident
+_HIST_SHIFT = 4
+_HIST_BINS = 1 << (3 * (8 - _HIST_SHIFT))
 
-def _strip_data_uri_prefix(data: str) -> str:
-    """Remove data URI prefixes so the payload can be decoded."""
-    return DATA_URI_PATTERN.sub("", data or "")
+# Pixels sampled per frame or logo crop before the shared clustering pass, and
+# the number of colors kept in the resulting palette
+_PIXELS_PER_IMAGE = 2000
+_PALETTE_SIZE = 5
 
+# JPEG decoding and color conversion release the GIL, so frames and logo
+# crops are decoded and sampled in parallel
+_SAMPLE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=min(8, os.cpu_count() or 1),
+    thread_name_prefix="color-sample",
+)
 
-def _decode_base64_image(data: str) -> np.ndarray:
-    """Decode a base64 image (optionally with data URI prefix) into a BGR numpy array."""
-    stripped = _strip_data_uri_prefix(data)
-    if not stripped:
-        raise ValueError("Empty base64 image payload")
+# Uppercase two-digit HEX for every channel value
+_HEX_BYTE = [f"{i:02X}" for i in range(256)]
 
-    try:
-        image_bytes = base64.b64decode(stripped)
-    except Exception as exc:  # noqa: BLE001
-        raise ValueError("Invalid base64 image payload") from exc
 
-    np_arr = np.frombuffer(image_bytes, dtype=np.uint8)
-    image = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+def _rgb_to_hex(r: int, g: int, b: int) -> str:
+    """Convert RGB values to HEX color code."""
+    return "#" + _HEX_BYTE[r] + _HEX_BYTE[g] + _HEX_BYTE[b]
+
+
+def _sample_pixels(image: np.ndarray, sample_size: int = 10000) -> np.ndarray:
+    """
+    Sample about ``sample_size`` pixels from a BGR image, kept in BGR order.
 
-    if image is None:
-        raise ValueError("Failed to decode image from base64 payload")
+    Clustering does not depend on channel order, so the conversion to RGB is
+    left to the final HEX formatting. Pure black and pure white pixels are
+    dropped, as they are usually background or artifacts.
+    """
+    # Downscale large images to about sample_size pixels; INTER_AREA averages
+    # each tile, which is cheaper than random sampling and smooths out noise
+    height, width = image.shape[:2]
+    if height * width > sample_size:
+        scale = (sample_size / (height * width)) ** 0.5
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    
+    # Reshape to list of pixels
+    pixels = image.reshape(-1, 3)
+    
+    # Remove pure black and pure white; a channel sum of 0 or 765 identifies
+    # them in a single pass
+    channel_sum = pixels.sum(axis=1, dtype=np.int32)
+    return pixels[(channel_sum > 0) & (channel_sum < 765)]
 
-    return image
 
+def _histogram_seed_labels(data: np.ndarray, n_colors: int) -> Optional[np.ndarray]:
+    """
+    Seed K-means from the most populated coarse color buckets.
 
-def _rgb_to_hex(r: int, g: int, b: int) -> str:
-    """Convert RGB values to HEX color code."""
-    return f"#{r:02x}{g:02x}{b:02x}".upper()
+    Each pixel is labelled with its nearest seed, so a single deterministic
+    K-means run can replace several random k-means++ attempts. Returns None
+    when the pixels span fewer than ``n_colors`` buckets.
+    """
+    coarse = data.astype(np.int32) >> _HIST_SHIFT
+    buckets = (coarse[:, 0] << 8) | (coarse[:, 1] << 4) | coarse[:, 2]
+    hist = np.bincount(buckets, minlength=_HIST_BINS).astype(np.int32)
+
+    top = np.argsort(-hist, kind="stable")[:n_colors]
+    if hist[top[-1]] == 0:
+        return None
+
+    # Bucket centres back in 0..255 BGR space
+    half = 1 << (_HIST_SHIFT - 1)
+    seeds = np.stack(
+        ((top >> 8) & 0xF, (top >> 4) & 0xF, top & 0xF),
+        axis=1,
+    ).astype(np.float32) * (1 << _HIST_SHIFT) + half
+
+    distances = ((data[:, None, :] - seeds[None, :, :]) ** 2).sum(axis=2)
+    return distances.argmin(axis=1).astype(np.int32).reshape(-1, 1)
+
+
+def _sample_image_base64(image_base64: str) -> np.ndarray:
+    """Decode a base64 image and sample its pixels for the shared clustering pass."""
+    return _sample_pixels(decode_base64_image(image_base64), _PIXELS_PER_IMAGE)
+
+
+def _cluster_dominant_colors(pixels: np.ndarray, n_colors: int) -> List[str]:
+    """
+    Cluster BGR pixels with K-means and return HEX centers sorted by frequency.
+    """
+    if len(pixels) < n_colors:
+        # If not enough pixels, use all unique colors
+        unique_colors = np.unique(pixels.reshape(-1, 3), axis=0)
+        hex_colors = [_rgb_to_hex(r, g, b) for b, g, r in unique_colors.tolist()]
+        return hex_colors[:n_colors]
+    
+    # Apply K-means clustering (OpenCV's native implementation), seeded from
+    # the color histogram when possible
+    data = pixels.astype(np.float32, copy=False)
+    seed_labels = _histogram_seed_labels(data, n_colors)
+    if seed_labels is not None:
+        _, labels, centers = cv2.kmeans(
+            data,
+            n_colors,
+            seed_labels,
+            _KMEANS_CRITERIA,
+            1,
+            cv2.KMEANS_USE_INITIAL_LABELS,
+        )
+    else:
+        _, labels, centers = cv2.kmeans(
+            data,
+            n_colors,
+            None,
+            _KMEANS_CRITERIA,
+            _KMEANS_ATTEMPTS,
+            cv2.KMEANS_PP_CENTERS,
+        )
+    
+    # Sort cluster centers (dominant colors) by pixel count, dropping any
+    # cluster that ended up empty
+    counts = np.bincount(labels.ravel(), minlength=n_colors)
+    order = np.argsort(-counts, kind="stable")
+    colors = centers[order[counts[order] > 0]].astype(int).tolist()
+    
+    # Images with fewer distinct colors than clusters yield duplicate centers
+    hex_colors = (_rgb_to_hex(r, g, b) for b, g, r in colors)
+    return list(dict.fromkeys(hex_colors))
 
 
 def _extract_dominant_colors(
@@ -83,101 +183,65 @@ def _extract_dominant_colors(
     Returns:
         List of HEX color codes sorted by frequency
     """
-    # Convert BGR to RGB
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    
-    # Reshape to list of pixels
-    pixels = image_rgb.reshape(-1, 3)
-    
-    # Sample pixels if image is too large
-    if len(pixels) > sample_size:
-        indices = np.random.choice(len(pixels), sample_size, replace=False)
-        pixels = pixels[indices]
-    
-    # Remove pure black and pure white (often background/artifacts)
-    mask = ~((pixels == [0, 0, 0]).all(axis=1) | (pixels == [255, 255, 255]).all(axis=1))
-    pixels = pixels[mask]
-    
-    if len(pixels) < n_colors:
-        # If not enough pixels, use all unique colors
-        unique_colors = np.unique(pixels.reshape(-1, 3), axis=0)
-        hex_colors = [_rgb_to_hex(int(r), int(g), int(b)) for r, g, b in unique_colors]
-        return hex_colors[:n_colors]
-    
-    # Apply K-means clustering
-    kmeans = KMeans(n_clusters=n_colors, random_state=42, n_init=10)
-    kmeans.fit(pixels)
-    
-    # Get cluster centers (dominant colors)
-    colors = kmeans.cluster_centers_.astype(int)
-    
-    # Count pixels in each cluster to sort by frequency
-    labels = kmeans.labels_
-    label_counts = Counter(labels)
-    
-    # Sort colors by frequency
-    sorted_colors = sorted(
-        zip(colors, [label_counts[i] for i in range(len(colors))]),
-        key=lambda x: x[1],
-        reverse=True,
+    return _cluster_dominant_colors(_sample_pixels(image, sample_size), n_colors)
+
+
+def _palette_from_pixels(pixel_sets: List[np.ndarray]) -> Optional[ColorPalette]:
+    """
+    Build a palette from pixels sampled across several images.
+
+    All samples are clustered together in one K-means run, so colors are
+    weighted by how much of the footage they cover.
+    """
+    if not pixel_sets:
+        return None
+
+    colors = _cluster_dominant_colors(np.concatenate(pixel_sets), _PALETTE_SIZE)
+    if not colors:
+        return None
+
+    return ColorPalette(
+        dominant_colors=colors[:3],
+        secondary_colors=colors[3:],
+        color_count=len(colors),
     )
-    
-    hex_colors = [_rgb_to_hex(int(r), int(g), int(b)) for (r, g, b), _ in sorted_colors]
-    
-    return hex_colors
 
 
-def _calculate_color_distance(hex1: str, hex2: str) -> float:
+@dataclass(frozen=True)
+class _LabPalette:
+    """LAB palette stored as parallel float32 channel arrays."""
+
+    L: np.ndarray
+    a: np.ndarray
+    b: np.ndarray
+
+
+@lru_cache(maxsize=256)
+def _hex_palette_to_lab(palette: Tuple[str, ...]) -> _LabPalette:
     """
-    Calculate perceptual color distance between two HEX colors using LAB color space.
-    
-    Returns:
-        Distance value (0 = identical, higher = more different)
+    Convert a tuple of HEX colors into a LAB palette.
+
+    Uses OpenCV's RGB -> LAB conversion on 0..1 float input, which keeps
+    LAB in its natural units (L in 0..100) so the distance thresholds apply
+    directly. Results are cached (the brand palette is compared against
+    several others per request), so the channel arrays are read-only.
     """
-    def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
-        hex_color = hex_color.lstrip("#")
-        return tuple(int(hex_color[i : i + 2], 16) for i in (0, 2, 4))
-    
-    def rgb_to_lab(rgb: Tuple[int, int, int]) -> Tuple[float, float, float]:
-        """Convert RGB to LAB color space."""
-        r, g, b = [x / 255.0 for x in rgb]
-        
-        # Convert to XYZ
-        def f(t: float) -> float:
-            return ((t + 0.055) / 1.055) ** 2.4 if t > 0.04045 else t / 12.92
-        
-        r, g, b = f(r), f(g), f(b)
-        
-        x = (r * 0.4124 + g * 0.3576 + b * 0.1805) / 0.95047
-        y = (r * 0.2126 + g * 0.7152 + b * 0.0722) / 1.00000
-        z = (r * 0.0193 + g * 0.1192 + b * 0.9505) / 1.08883
-        
-        def f2(t: float) -> float:
-            return t ** (1.0 / 3.0) if t > 0.008856 else (7.787 * t + 16.0 / 116.0)
-        
-        x, y, z = f2(x), f2(y), f2(z)
-        
-        L = (116.0 * y) - 16.0
-        a = 500.0 * (x - y)
-        b = 200.0 * (y - z)
-        
-        return (L, a, b)
-    
-    rgb1 = hex_to_rgb(hex1)
-    rgb2 = hex_to_rgb(hex2)
-    
-    lab1 = rgb_to_lab(rgb1)
-    lab2 = rgb_to_lab(rgb2)
-    
-    # Calculate Euclidean distance in LAB space
-    distance = sum((a - b) ** 2 for a, b in zip(lab1, lab2)) ** 0.5
-    
-    return distance
+    hex_digits = "".join(color.lstrip("#") for color in palette)
+    rgb = np.frombuffer(bytes.fromhex(hex_digits), dtype=np.uint8).reshape(-1, 1, 3)
+    rgb = rgb.astype(np.float32) / 255.0
+
+    lab = cv2.cvtColor(rgb, cv2.COLOR_RGB2LAB).reshape(-1, 3)
+
+    # Split into contiguous per-channel arrays
+    channels = [np.ascontiguousarray(lab[:, i]) for i in range(3)]
+    for channel in channels:
+        channel.setflags(write=False)
+    return _LabPalette(*channels)
 
 
 def _calculate_color_alignment(
-    palette1: List[str],
-    palette2: List[str],
+    palette1: Union[List[str], _LabPalette],
+    palette2: Union[List[str], _LabPalette],
     threshold: float = 120.0,  # Increased from 50.0 for more lenient matching
 ) -> float:
     """
@@ -186,70 +250,77 @@ def _calculate_color_alignment(
     Uses a more relaxed threshold to allow for reasonable color variations
     while still penalizing completely different color schemes.
     
+    Palettes may be given as HEX strings or as pre-converted LAB palettes.
+    
     Returns:
         Score between 0 and 1 (1 = perfect alignment)
     """
-    if not palette1 or not palette2:
+    if not isinstance(palette1, _LabPalette):
+        if not palette1:
+            return 0.0
+        palette1 = _hex_palette_to_lab(tuple(palette1))
+    if not isinstance(palette2, _LabPalette):
+        if not palette2:
+            return 0.0
+        palette2 = _hex_palette_to_lab(tuple(palette2))
+    if not len(palette1.L) or not len(palette2.L):
         return 0.0
-    
-    # Find minimum distances between colors in the two palettes
-    min_distances = []
-    for color1 in palette1:
-        distances = [_calculate_color_distance(color1, color2) for color2 in palette2]
-        min_distances.append(min(distances))
+
+    # Pairwise Euclidean distances in LAB space, then the closest match for
+    # each color in the first palette
+    dl = palette1.L[:, None] - palette2.L[None, :]
+    da = palette1.a[:, None] - palette2.a[None, :]
+    db = palette1.b[:, None] - palette2.b[None, :]
+    dl *= dl
+    da *= da
+    db *= db
+    dl += da
+    dl += db
+    d = np.sqrt(dl.min(axis=1))
     
     # Convert distances to scores using a softer, more lenient curve
     # Using a higher threshold and a square root curve for gentler penalties
-    # This gives partial credit even for moderately different colors
-    scores = []
-    for d in min_distances:
-        if d < 20:
-            # Very close colors get high score
-            score = 1.0 - (d / 40.0)
-        elif d < threshold:
-            # Moderate differences get partial credit with softer penalty
-            normalized = (d - 20) / (threshold - 20)
-            score = 0.8 * (1.0 - (normalized ** 0.7))  # Square root curve for gentler falloff
-        else:
-            # Very different colors still get minimal credit
-            excess = d - threshold
-            score = max(0.1, 0.3 - (excess / (threshold * 2)))
-        scores.append(score)
+    # This gives partial credit even for moderately different colors:
+    # - very close colors (< 20) get high score
+    # - moderate differences get partial credit with a softer penalty
+    # - very different colors still get minimal credit
+    normalized = np.clip((d - 20) / (threshold - 20), 0.0, None)
+    scores = np.where(
+        d < 20,
+        1.0 - (d / 40.0),
+        np.where(
+            d < threshold,
+            0.8 * (1.0 - normalized ** 0.7),
+            np.maximum(0.1, 0.3 - (d - threshold) / (threshold * 2)),
+        ),
+    )
     
     # Return average score
-    return sum(scores) / len(scores) if scores else 0.0
+    return float(scores.mean())
 
 
 def _analyze_frame_colors(frames: List[ExtractedFrame]) -> ColorPalette:
     """Extract dominant colors from a set of frames."""
-    all_colors: List[str] = []
-    
-    for frame in frames[:8]:  # Analyze first 8 frames
+    def _sample_frame(frame: ExtractedFrame) -> Optional[np.ndarray]:
         try:
-            image = _decode_base64_image(frame.image_base64)
-            colors = _extract_dominant_colors(image, n_colors=3)
-            all_colors.extend(colors)
+            return _sample_image_base64(frame.image_base64)
         except Exception as exc:
             logger.warning("Failed to extract colors from frame %d: %s", frame.frame_number, exc)
+            return None
     
-    if not all_colors:
+    # Analyze first 8 frames
+    samples = _SAMPLE_EXECUTOR.map(_sample_frame, frames[:8])
+    pixel_sets = [pixels for pixels in samples if pixels is not None]
+    
+    palette = _palette_from_pixels(pixel_sets)
+    if palette is None:
         return ColorPalette(
             dominant_colors=[],
             secondary_colors=[],
             color_count=0,
         )
     
-    # Count color frequencies
-    color_counts = Counter(all_colors)
-    
-    # Get top 5 most frequent colors
-    top_colors = [color for color, _ in color_counts.most_common(5)]
-    
-    return ColorPalette(
-        dominant_colors=top_colors[:3],
-        secondary_colors=top_colors[3:],
-        color_count=len(set(all_colors)),
-    )
+    return palette
 
 
 def _extract_response_text(response: GenerateContentResponse) -> str:
@@ -349,35 +420,58 @@ def _get_llm_color_feedback(
         return None
 
 
-def _analyze_logo_colors(detections: List[DetectedLogo]) -> Optional[ColorPalette]:
-    """Extract colors from detected logo crops."""
+def _crop_detection(detection: DetectedLogo, frame_image: np.ndarray) -> np.ndarray:
+    """Cut a detected logo out of its frame using the normalized bounding box."""
+    bbox = detection.bounding_box
+    if bbox is None:
+        return frame_image
+    
+    fh, fw = frame_image.shape[:2]
+    x1 = min(int(bbox.x * fw), fw - 1)
+    y1 = min(int(bbox.y * fh), fh - 1)
+    x2 = max(min(int(round((bbox.x + bbox.width) * fw)), fw), x1 + 1)
+    y2 = max(min(int(round((bbox.y + bbox.height) * fh)), fh), y1 + 1)
+    return frame_image[y1:y2, x1:x2]
+
+
+def _analyze_logo_colors(
+    detections: List[DetectedLogo],
+    frames: Optional[List[ExtractedFrame]] = None,
+) -> Optional[ColorPalette]:
+    """
+    Extract colors from detected logos.
+
+    Uses the detection's crop image when present, otherwise crops the logo
+    from the matching frame via its bounding box.
+    """
     if not detections:
         return None
     
-    all_colors: List[str] = []
+    frames_by_number = {frame.frame_number: frame for frame in frames or []}
     
-    for detection in detections[:5]:  # Analyze up to 5 detections
-        if not detection.crop_image_base64:
-            continue
-        
+    def _sample_detection(detection: DetectedLogo) -> Optional[np.ndarray]:
         try:
-            image = _decode_base64_image(detection.crop_image_base64)
-            colors = _extract_dominant_colors(image, n_colors=3)
-            all_colors.extend(colors)
+            if detection.crop_image_base64:
+                return _sample_image_base64(detection.crop_image_base64)
+            
+            frame = frames_by_number.get(detection.frame_number)
+            if frame is None:
+                return None
+            
+            crop = _crop_detection(detection, decode_base64_image(frame.image_base64))
+            return _sample_pixels(crop, _PIXELS_PER_IMAGE)
         except Exception as exc:
             logger.warning("Failed to extract colors from logo crop: %s", exc)
+            return None
     
-    if not all_colors:
-        return None
-    
-    color_counts = Counter(all_colors)
-    top_colors = [color for color, _ in color_counts.most_common(5)]
+    # Analyze up to 5 detections
+    pixel_sets = [
+        pixels
+        for pixels in _SAMPLE_EXECUTOR.map(_sample_detection, detections[:5])
+        if pixels is not None
+    ]
     
-    return ColorPalette(
-        dominant_colors=top_colors[:3],
-        secondary_colors=top_colors[3:],
-        color_count=len(set(all_colors)),
-    )
+    return _palette_from_pixels(pixel_sets)
 
 
 def run_color_harmony(request: ColorHarmonyRequest) -> ColorHarmonyResult:
@@ -387,7 +481,7 @@ def run_color_harmony(request: ColorHarmonyRequest) -> ColorHarmonyResult:
     
     # Extract colors from brand logo
     try:
-        brand_logo_image = _decode_base64_image(request.brand_logo_base64)
+        brand_logo_image = decode_base64_image(request.brand_logo_base64)
         brand_logo_colors = _extract_dominant_colors(brand_logo_image, n_colors=5)
         brand_palette = ColorPalette(
             dominant_colors=brand_logo_colors[:3],
@@ -403,7 +497,7 @@ def run_color_harmony(request: ColorHarmonyRequest) -> ColorHarmonyResult:
         )
     
     # Analyze logo colors if detections exist
-    logo_palette = _analyze_logo_colors(request.logo_detections)
+    logo_palette = _analyze_logo_colors(request.logo_detections, request.frames)
     
     # Analyze frame colors
     frames_to_analyze = request.frames[:8]
@@ -412,21 +506,31 @@ def run_color_harmony(request: ColorHarmonyRequest) -> ColorHarmonyResult:
     # Calculate alignment scores
     alignment_scores: List[float] = []
     
+    # Convert the brand palette to LAB once for both comparisons
+    brand_lab = (
+        _hex_palette_to_lab(tuple(brand_palette.dominant_colors))
+        if brand_palette.dominant_colors
+        else None
+    )
+    
     # Compare frame colors to brand colors
-    if frame_palette.dominant_colors and brand_palette.dominant_colors:
+    if frame_palette.dominant_colors and brand_lab is not None:
         frame_alignment = _calculate_color_alignment(
             frame_palette.dominant_colors,
-            brand_palette.dominant_colors,
+            brand_lab,
         )
         alignment_scores.append(frame_alignment)
     
     # Compare logo colors to brand colors if available
-    if logo_palette and logo_palette.dominant_colors and brand_palette.dominant_colors:
-        logo_alignment = _calculate_color_alignment(
-            logo_palette.dominant_colors,
-            brand_palette.dominant_colors,
-        )
-        alignment_scores.append(logo_alignment)
+    logo_brand_alignment: Optional[float] = None
+    if logo_palette and logo_palette.dominant_colors:
+        logo_brand_alignment = 0.0
+        if brand_lab is not None:
+            logo_brand_alignment = _calculate_color_alignment(
+                logo_palette.dominant_colors,
+                brand_lab,
+            )
+            alignment_scores.append(logo_brand_alignment)
     
     # Overall alignment score
     color_alignment_score = (
@@ -468,15 +572,10 @@ def run_color_harmony(request: ColorHarmonyRequest) -> ColorHarmonyResult:
             "Color alignment is moderate. Fine-tuning could improve brand consistency."
         )
     
-    if logo_palette and logo_palette.dominant_colors:
-        logo_brand_alignment = _calculate_color_alignment(
-            logo_palette.dominant_colors,
-            brand_palette.dominant_colors,
+    if logo_brand_alignment is not None and logo_brand_alignment < 0.6:
+        recommendations.append(
+            "Detected logo colors differ from brand reference. Verify logo accuracy."
         )
-        if logo_brand_alignment < 0.6:
-            recommendations.append(
-                "Detected logo colors differ from brand reference. Verify logo accuracy."
-            )
     
     if not recommendations:
         recommendations.append("Color harmony is well-aligned with brand identity.")
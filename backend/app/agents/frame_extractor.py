@@ -7,26 +7,49 @@ This is a non-AI utility agent that prepares video frames for downstream analysi
 
 from __future__ import annotations
 
-import base64
+import io
 import logging
 import os
-import re
 import tempfile
-from typing import List
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterator, Optional, Tuple
 
 import cv2
+import numpy as np
 
-from ..schemas.critique import FrameExtractionRequest, FrameExtractionResult
+try:
+    import pybase64 as base64  # type: ignore
+except ImportError:  # pybase64 is an optional SIMD speed-up; fall back to stdlib base64
+    import base64
+
+try:
+    import av  # type: ignore
+except ImportError:  # PyAV is optional; fall back to OpenCV with a temp file
+    av = None
+
+from ..schemas.critique import (
+    FrameExtractionRequest,
+    FrameExtractionResult,
+)
+from ..services.media import strip_data_uri_prefix
 
 logger = logging.getLogger(__name__)
 
 
-DATA_URI_PATTERN = re.compile(r"^data:.+;base64,")
+# Downstream agents only need colour and shape information, so a lower JPEG
+# quality roughly halves encode time and payload size.
+_JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 80]
 
+# cv2.imencode releases the GIL, so sampled frames are encoded on a small pool
+# while decoding continues.
+_ENCODE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=min(4, os.cpu_count() or 1),
+    thread_name_prefix="frame-encode",
+)
 
-def _strip_data_uri_prefix(data: str) -> str:
-    """Remove data URI prefixes so the payload can be decoded."""
-    return DATA_URI_PATTERN.sub("", data)
+# Encoded frames allowed in flight ahead of the consumer
+_MAX_PENDING_ENCODES = 8
 
 
 def _decode_base64(data: str) -> bytes:
@@ -37,37 +60,149 @@ def _decode_base64(data: str) -> bytes:
         raise ValueError("Invalid base64 payload provided for video") from exc
 
 
-def _encode_frame_to_base64(frame) -> str:
+def _encode_frame_to_base64(frame, max_side: Optional[int] = None) -> str:
     """Encode a video frame (numpy array) to base64 JPEG."""
+    # Downscale so the longest side is at most max_side
+    if max_side:
+        height, width = frame.shape[:2]
+        scale = max_side / max(height, width)
+        if scale < 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
     # Encode frame as JPEG
-    success, buffer = cv2.imencode('.jpg', frame)
+    success, buffer = cv2.imencode('.jpg', frame, _JPEG_PARAMS)
     if not success:
         raise ValueError("Failed to encode frame as JPEG")
     
     # Convert to base64
-    jpg_as_text = base64.b64encode(buffer).decode('utf-8')
+    jpg_as_text = base64.b64encode(buffer).decode('ascii')
     return f"data:image/jpeg;base64,{jpg_as_text}"
 
 
-def run_frame_extraction(request: FrameExtractionRequest) -> FrameExtractionResult:
+def _frame_interval(fps: float, frames_per_second: float) -> int:
+    """Number of source frames between two extracted frames."""
+    frame_interval = int(fps / frames_per_second) if fps > 0 else 1
+    return max(frame_interval, 1)
+
+
+def _encode_frames(
+    sampled: Iterator[Tuple[int, float, np.ndarray]],
+    max_side: Optional[int],
+) -> Iterator[dict]:
     """
-    Extract frames from a video at the specified frames per second rate.
-    
-    Args:
-        request: Contains the video base64 and extraction parameters
-        
-    Returns:
-        FrameExtractionResult with extracted frames as base64-encoded images
+    Resize and JPEG-encode sampled frames on the shared pool, yielding them in
+    frame order.
+
+    At most ``_MAX_PENDING_ENCODES`` frames are in flight, so decoding never
+    runs far ahead of the consumer and raw frames do not pile up in memory.
     """
-    # Decode video
-    stripped = _strip_data_uri_prefix(request.video_base64)
-    decoded_bytes = _decode_base64(stripped)
+    pending: Deque[Tuple[int, float, Future]] = deque()
+
+    def _finish(frame_count: int, timestamp: float, future: Future) -> Optional[dict]:
+        try:
+            frame_base64 = future.result()
+        except Exception as exc:
+            logger.warning("Failed to encode frame %d: %s", frame_count, exc)
+            return None
+
+        logger.debug(
+            "Extracted frame %d at timestamp %.2fs",
+            frame_count,
+            timestamp,
+        )
+        return {
+            "frame_number": frame_count,
+            "timestamp": round(timestamp, 2),
+            "image_base64": frame_base64,
+        }
+
+    for frame_count, timestamp, frame in sampled:
+        future = _ENCODE_EXECUTOR.submit(_encode_frame_to_base64, frame, max_side)
+        pending.append((frame_count, timestamp, future))
+
+        if len(pending) >= _MAX_PENDING_ENCODES:
+            result = _finish(*pending.popleft())
+            if result is not None:
+                yield result
+
+    while pending:
+        result = _finish(*pending.popleft())
+        if result is not None:
+            yield result
+
+
+def _sample_with_pyav(
+    decoded_bytes: bytes,
+    frames_per_second: float,
+    stats: Dict[str, float],
+) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """
+    Decode the video in memory with PyAV, yielding sampled BGR frames.
+
+    FPS and duration are stored in ``stats`` before the first frame is
+    yielded; the number of decoded frames once decoding finishes.
+    """
+    with av.open(io.BytesIO(decoded_bytes), mode="r") as container:
+        if not container.streams.video:
+            raise ValueError("Video contains no video stream")
+
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+
+        fps = float(stream.average_rate or 0)
+        if stream.duration is not None and stream.time_base is not None:
+            duration = float(stream.duration * stream.time_base)
+        elif container.duration is not None:
+            duration = container.duration / av.time_base
+        else:
+            duration = stream.frames / fps if fps > 0 else 0
+
+        stats["fps"] = fps
+        stats["duration"] = duration
+
+        logger.info(
+            "Video properties - FPS: %.2f, Total frames: %d, Duration: %.2fs",
+            fps,
+            stream.frames,
+            duration,
+        )
+
+        frame_interval = _frame_interval(fps, frames_per_second)
+        logger.info(
+            "Extracting frames at %.1f fps (every %d frames)",
+            frames_per_second,
+            frame_interval,
+        )
+
+        frame_count = 0
+
+        for video_frame in container.decode(stream):
+            if frame_count % frame_interval == 0:
+                timestamp = frame_count / fps if fps > 0 else 0
+                yield frame_count, timestamp, video_frame.to_ndarray(format="bgr24")
+            frame_count += 1
 
+        stats["frame_count"] = frame_count
+
+
+def _sample_with_opencv(
+    decoded_bytes: bytes,
+    frames_per_second: float,
+    stats: Dict[str, float],
+) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """
+    Decode the video with OpenCV (which needs the video on disk), yielding
+    sampled BGR frames.
+
+    FPS and duration are stored in ``stats`` before the first frame is
+    yielded; the number of decoded frames once decoding finishes.
+    """
     # Save video to temporary file
     with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_video_file:
         temp_video_file.write(decoded_bytes)
         temp_video_path = temp_video_file.name
 
+    video = None
     try:
         logger.info("Opening video file with OpenCV...")
         
@@ -81,6 +216,9 @@ def run_frame_extraction(request: FrameExtractionRequest) -> FrameExtractionResu
         fps = video.get(cv2.CAP_PROP_FPS)
         total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
         duration = total_frames / fps if fps > 0 else 0
+
+        stats["fps"] = fps
+        stats["duration"] = duration
         
         logger.info(
             "Video properties - FPS: %.2f, Total frames: %d, Duration: %.2fs",
@@ -89,13 +227,7 @@ def run_frame_extraction(request: FrameExtractionRequest) -> FrameExtractionResu
             duration,
         )
         
-        # Calculate frame interval
-        frames_per_second = request.frames_per_second or 2.0
-        frame_interval = int(fps / frames_per_second) if fps > 0 else 1
-        
-        if frame_interval < 1:
-            frame_interval = 1
-        
+        frame_interval = _frame_interval(fps, frames_per_second)
         logger.info(
             "Extracting frames at %.1f fps (every %d frames)",
             frames_per_second,
@@ -103,50 +235,79 @@ def run_frame_extraction(request: FrameExtractionRequest) -> FrameExtractionResu
         )
         
         # Extract frames
-        frames = []
         frame_count = 0
-        extracted_count = 0
         
-        while True:
-            success, frame = video.read()
-            
-            if not success:
-                break
-            
-            # Extract frame at the specified interval
+        # grab() advances the decoder without converting the frame; only
+        # frames at the sampling interval are retrieved into BGR arrays
+        while video.grab():
             if frame_count % frame_interval == 0:
-                try:
-                    frame_base64 = _encode_frame_to_base64(frame)
+                success, frame = video.retrieve()
+                if success:
                     timestamp = frame_count / fps if fps > 0 else 0
-                    
-                    frames.append({
-                        "frame_number": frame_count,
-                        "timestamp": round(timestamp, 2),
-                        "image_base64": frame_base64,
-                    })
-                    
-                    extracted_count += 1
-                    logger.debug(
-                        "Extracted frame %d at timestamp %.2fs",
-                        frame_count,
-                        timestamp,
-                    )
-                except Exception as exc:
-                    logger.warning("Failed to encode frame %d: %s", frame_count, exc)
+                    yield frame_count, timestamp, frame
             
             frame_count += 1
+
+        stats["frame_count"] = frame_count
+
+    finally:
+        if video is not None:
+            video.release()
+
+        # Cleanup temporary file
+        try:
+            if os.path.exists(temp_video_path):
+                os.unlink(temp_video_path)
+        except Exception as exc:
+            logger.warning("Failed to cleanup temp video file: %s", exc)
+
+
+def _stream_frames(
+    request: FrameExtractionRequest,
+    stats: Dict[str, float],
+) -> Iterator[dict]:
+    """Decode the request's video and lazily yield encoded frames."""
+    # Decode video
+    stripped = strip_data_uri_prefix(request.video_base64)
+    decoded_bytes = _decode_base64(stripped)
+
+    frames_per_second = request.frames_per_second or 2.0
+    sampler = _sample_with_pyav if av is not None else _sample_with_opencv
+
+    return _encode_frames(
+        sampler(decoded_bytes, frames_per_second, stats),
+        request.max_side,
+    )
+
+
+def run_frame_extraction(request: FrameExtractionRequest) -> FrameExtractionResult:
+    """
+    Extract frames from a video at the specified frames per second rate.
+    
+    Args:
+        request: Contains the video base64 and extraction parameters
         
-        video.release()
+    Returns:
+        FrameExtractionResult with extracted frames as base64-encoded images
+    """
+    frames_per_second = request.frames_per_second or 2.0
+    stats: Dict[str, float] = {}
+    frames_iter = _stream_frames(request, stats)
+
+    try:
+        frames = list(frames_iter)
+        fps = stats.get("fps", 0.0)
+        duration = stats.get("duration", 0.0)
         
         logger.info(
             "Frame extraction complete: %d frames extracted from %d total frames",
-            extracted_count,
-            frame_count,
+            len(frames),
+            stats.get("frame_count", 0),
         )
         
         return FrameExtractionResult(
             frames=frames,
-            total_frames_extracted=extracted_count,
+            total_frames_extracted=len(frames),
             video_duration=round(duration, 2),
             video_fps=round(fps, 2),
             extraction_rate=frames_per_second,
@@ -156,12 +317,3 @@ def run_frame_extraction(request: FrameExtractionRequest) -> FrameExtractionResu
     except Exception as exc:
         logger.exception("Failed to extract frames from video")
         raise ValueError(f"Frame extraction failed: {str(exc)}") from exc
-        
-    finally:
-        # Cleanup temporary file
-        try:
-            if os.path.exists(temp_video_path):
-                os.unlink(temp_video_path)
-        except Exception as exc:
-            logger.warning("Failed to cleanup temp video file: %s", exc)
-
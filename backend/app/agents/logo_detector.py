@@ -5,128 +5,370 @@ Attempts to locate the brand logo within extracted video frames using:
 1. OpenCV template matching across multiple scales.
 2. CLIP similarity scoring when the transformers stack is available.
 
-The agent returns the most confident detections alongside cropped logo images
-that downstream colour analysis agents can re-use.
+The agent returns the most confident detections with bounding boxes that
+downstream colour analysis agents use to crop the logo from the frames
+(cropped images are only encoded when requested).
 """
 
 from __future__ import annotations
 
 import base64
+import hashlib
 import logging
 import math
 import os
-import re
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
 from ..schemas.critique import (
     DetectedLogo,
+    ExtractedFrame,
     LogoBoundingBox,
     LogoDetectionRequest,
     LogoDetectionResult,
 )
+from ..services.media import decode_base64_image
 
 logger = logging.getLogger(__name__)
 
 
-DATA_URI_PATTERN = re.compile(r"^data:.+;base64,")
+# Logo crops are only used for colour analysis, so they are encoded at a lower
+# quality with optimised Huffman tables
+_CROP_JPEG_PARAMS = [int(cv2.IMWRITE_JPEG_QUALITY), 80, int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]
 
+# Coarse-to-fine template search: longest frame side (pixels) of the coarse
+# search level, and the smallest template side worth matching there
+_COARSE_MAX_SIDE = 480
+_MIN_COARSE_TEMPLATE_SIDE = 16
 
-@dataclass
-class _TemplateMatchResult:
-    confidence: float
-    top_left: Tuple[int, int]
-    bottom_right: Tuple[int, int]
-    method: str
+# Stop trying further scales once a coarse match reaches this confidence
+_EARLY_EXIT_CONFIDENCE = 0.9
 
+# Frame windows whose pixel variance is below this fraction of their energy
+# (mean squared, plus one grey level) are flat and score zero
+_FLAT_WINDOW_RELATIVE_VARIANCE = 1e-3
 
-def _strip_data_uri_prefix(data: str) -> str:
-    """Remove data URI prefixes so the payload can be decoded."""
+# Frame decoding and template matching are OpenCV work that releases the GIL,
+# so frames are processed in parallel on a shared pool
+_FRAME_EXECUTOR = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix="logo-frame",
+)
 
-    return DATA_URI_PATTERN.sub("", data or "")
+_CLIP_MODEL_NAME = "openai/clip-vit-base-patch32"
 
+ENABLE_CLIP_LOGO = os.getenv("ENABLE_CLIP_LOGO", "true").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
 
-def _decode_base64_image(data: str) -> np.ndarray:
-    """Decode a base64 image (optionally with data URI prefix) into a BGR numpy array."""
+# Frames encoded per CLIP forward pass
+_CLIP_BATCH_SIZE = 32
 
-    stripped = _strip_data_uri_prefix(data)
-    if not stripped:
-        raise ValueError("Empty base64 image payload")
+# CLIP ViT-B/32 input size and RGB normalisation constants
+_CLIP_IMAGE_SIZE = 224
+_CLIP_MEAN = np.array([0.48145466, 0.4578275, 0.40821073], dtype=np.float32)
+_CLIP_STD = np.array([0.26862954, 0.26130258, 0.27577711], dtype=np.float32)
 
-    try:
-        image_bytes = base64.b64decode(stripped)
-    except Exception as exc:  # noqa: BLE001
-        raise ValueError("Invalid base64 image payload") from exc
+# Loading CLIP takes seconds, so the model is created once per process and
+# shared; reference logo embeddings are cached by pixel hash
+_CLIP_STATE: Dict[str, Any] = {
+    "model": None,
+    "device": None,
+    "onnx_session": None,
+}
+_CLIP_LOCK = threading.RLock()
+_LOGO_FEATURE_CACHE_SIZE = 32
+_LOGO_FEATURE_CACHE: "OrderedDict[str, Any]" = OrderedDict()
+
+
+@dataclass
+class _TemplateMatchResult:
+    confidence: float
+    top_left: Tuple[int, int]
+    bottom_right: Tuple[int, int]
+    method: str
 
-    np_arr = np.frombuffer(image_bytes, dtype=np.uint8)
-    image = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
 
-    if image is None:
-        raise ValueError("Failed to decode image from base64 payload")
+@dataclass
+class _CoarseTemplate:
+    scale: float
+    height: int
+    width: int
+    spectrum: np.ndarray
+    norm: float
 
-    return image
+
+@dataclass
+class _LogoPyramid:
+    gray: np.ndarray
+    scale_factors: List[float]
+    templates: Dict[float, np.ndarray]
+    coarse: Dict[Tuple[float, Tuple[int, int]], List[_CoarseTemplate]] = field(
+        default_factory=dict
+    )
 
 
 def _encode_image_to_base64(image: np.ndarray) -> str:
     """Encode an image (BGR) into base64 JPEG data URI."""
 
-    success, buffer = cv2.imencode(".jpg", image)
+    success, buffer = cv2.imencode(".jpg", image, _CROP_JPEG_PARAMS)
     if not success:
         raise ValueError("Failed to encode image to JPEG")
 
-    jpg_as_text = base64.b64encode(buffer).decode("utf-8")
+    jpg_as_text = base64.b64encode(buffer).decode("ascii")
     return f"data:image/jpeg;base64,{jpg_as_text}"
 
 
-def _run_template_matching(
-    frame: np.ndarray,
+def _resize_template(logo_gray: np.ndarray, factor: float) -> np.ndarray:
+    """Resize a grayscale logo by ``factor`` (area for shrinking, cubic for growing)."""
+
+    if math.isclose(factor, 1.0):
+        return logo_gray
+
+    return cv2.resize(
+        logo_gray,
+        (0, 0),
+        fx=factor,
+        fy=factor,
+        interpolation=cv2.INTER_AREA if factor < 1.0 else cv2.INTER_CUBIC,
+    )
+
+
+def _prepare_logo_pyramid(
     logo: np.ndarray,
     scale_factors: Optional[List[float]] = None,
-) -> Optional[_TemplateMatchResult]:
-    """Attempt to locate the logo within the frame using template matching."""
+) -> _LogoPyramid:
+    """Convert the logo to grayscale and resize it to every search scale once."""
 
     if scale_factors is None:
         scale_factors = [1.0, 0.9, 0.8, 0.7, 0.6, 1.1, 1.2]
 
-    frame_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    logo_gray_original = cv2.cvtColor(logo, cv2.COLOR_BGR2GRAY)
+    logo_gray = cv2.cvtColor(logo, cv2.COLOR_BGR2GRAY)
+
+    return _LogoPyramid(
+        gray=logo_gray,
+        scale_factors=scale_factors,
+        templates={scale: _resize_template(logo_gray, scale) for scale in scale_factors},
+    )
+
+
+def _pad_for_dft(image: np.ndarray, dft_shape: Tuple[int, int]) -> np.ndarray:
+    """Zero-pad an image into the top-left corner of a float32 DFT buffer."""
+
+    padded = np.zeros(dft_shape, dtype=np.float32)
+    padded[:image.shape[0], :image.shape[1]] = image
+    return padded
+
 
-    best_match: Optional[_TemplateMatchResult] = None
+def _coarse_templates(
+    logo_pyramid: _LogoPyramid,
+    pyramid_factor: float,
+    dft_shape: Tuple[int, int],
+) -> List[_CoarseTemplate]:
+    """
+    Return the search templates for a coarse level ``pyramid_factor`` times
+    the frame size, as spectra of zero-mean templates padded to ``dft_shape``.
+
+    Frames of one video share a size, so these are built once per request and
+    reused for every frame (concurrent first use only duplicates the work).
+    """
 
-    for scale in scale_factors:
-        resized_logo = logo_gray_original
-        if not math.isclose(scale, 1.0):
-            resized_logo = cv2.resize(
-                logo_gray_original,
-                (0, 0),
-                fx=scale,
-                fy=scale,
-                interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC,
+    key = (pyramid_factor, dft_shape)
+    templates = logo_pyramid.coarse.get(key)
+    if templates is None:
+        templates = []
+        for scale in logo_pyramid.scale_factors:
+            template = _resize_template(logo_pyramid.gray, scale * pyramid_factor)
+            th, tw = template.shape[:2]
+            if th > dft_shape[0] or tw > dft_shape[1] or min(th, tw) < 1:
+                continue
+
+            zero_mean = template.astype(np.float32)
+            zero_mean -= zero_mean.mean()
+            templates.append(
+                _CoarseTemplate(
+                    scale=scale,
+                    height=th,
+                    width=tw,
+                    spectrum=cv2.dft(_pad_for_dft(zero_mean, dft_shape)),
+                    norm=float(np.sqrt(np.square(zero_mean, dtype=np.float64).sum())),
+                )
             )
+        logo_pyramid.coarse[key] = templates
+
+    return templates
+
+
+def _window_sums(
+    integral: np.ndarray,
+    height: int,
+    width: int,
+    rows: int,
+    cols: int,
+) -> np.ndarray:
+    """Sum of every ``height`` x ``width`` window, read from an integral image."""
+
+    sums = integral[height:height + rows, width:width + cols] - integral[:rows, width:width + cols]
+    sums -= integral[height:height + rows, :cols]
+    sums += integral[:rows, :cols]
+    return sums
+
+
+def _search_scales(
+    frame_gray: np.ndarray,
+    logo_pyramid: _LogoPyramid,
+    pyramid_factor: float,
+) -> Optional[Tuple[float, float, Tuple[int, int]]]:
+    """
+    Match the logo at every scale against a (possibly downscaled) frame.
+
+    Computes TM_CCOEFF_NORMED in the frequency domain: the frame is
+    transformed once and each template spectrum is multiplied against it, so
+    the frame DFT is not redone for every scale as separate matchTemplate
+    calls would.
+
+    Returns the best (confidence, scale, top_left) or None if no scale fits.
+    """
+
+    fh, fw = frame_gray.shape[:2]
+    dft_shape = (cv2.getOptimalDFTSize(fh), cv2.getOptimalDFTSize(fw))
+
+    templates = _coarse_templates(logo_pyramid, pyramid_factor, dft_shape)
+    if not templates:
+        return None
+
+    frame_spectrum = cv2.dft(_pad_for_dft(frame_gray, dft_shape))
 
-        th, tw = resized_logo.shape[:2]
-        fh, fw = frame_gray.shape[:2]
+    # Integral images of the frame and its square are shared by every scale,
+    # giving each window's sum and squared sum from four lookups
+    sums, sqsums = cv2.integral2(frame_gray, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
 
-        if th >= fh or tw >= fw:
+    best: Optional[Tuple[float, float, Tuple[int, int]]] = None
+
+    for template in templates:
+        th, tw = template.height, template.width
+
+        if th >= fh or tw >= fw or template.norm == 0.0:
             continue
 
-        result = cv2.matchTemplate(frame_gray, resized_logo, cv2.TM_CCOEFF_NORMED)
+        rh, rw = fh - th + 1, fw - tw + 1
+
+        # Correlation of the frame with the zero-mean template
+        correlation = cv2.idft(
+            cv2.mulSpectrums(frame_spectrum, template.spectrum, 0, conjB=True),
+            flags=cv2.DFT_REAL_OUTPUT | cv2.DFT_SCALE,
+        )[:rh, :rw]
+
+        # Denominator: template norm times each window's standard deviation
+        # (times window size), computed in place to avoid temporaries
+        window_size = th * tw
+        window_sum = _window_sums(sums, th, tw, rh, rw)
+        denominator = _window_sums(sqsums, th, tw, rh, rw)
+        np.multiply(window_sum, window_sum, out=window_sum)
+        window_sum *= 1.0 / window_size
+        denominator -= window_sum
+
+        # Flat windows correlate to rounding noise, which dividing by their
+        # near-zero deviation would turn into huge scores, so they score zero
+        window_sum += window_size
+        window_sum *= _FLAT_WINDOW_RELATIVE_VARIANCE
+        textured = denominator > window_sum
+
+        np.maximum(denominator, 0.0, out=denominator)
+        np.sqrt(denominator, out=denominator)
+        denominator *= template.norm
+
+        result = np.divide(
+            correlation,
+            denominator,
+            out=np.zeros_like(denominator),
+            where=textured,
+        )
+        np.clip(result, -1.0, 1.0, out=result)
         _, max_val, _, max_loc = cv2.minMaxLoc(result)
 
-        if best_match is None or max_val > best_match.confidence:
-            top_left = max_loc
-            bottom_right = (top_left[0] + tw, top_left[1] + th)
-            best_match = _TemplateMatchResult(
-                confidence=float(max_val),
-                top_left=top_left,
-                bottom_right=bottom_right,
-                method="template",
-            )
+        if best is None or max_val > best[0]:
+            best = (float(max_val), template.scale, max_loc)
+
+            # Scales are ordered by likelihood; stop once a match is clearly good
+            if max_val >= _EARLY_EXIT_CONFIDENCE:
+                break
+
+    return best
+
+
+def _run_template_matching(
+    frame_gray: np.ndarray,
+    logo_pyramid: _LogoPyramid,
+) -> Optional[_TemplateMatchResult]:
+    """
+    Attempt to locate the logo within a grayscale frame using template matching.
+
+    The scale search runs coarse-to-fine: every scale is tried on a copy of
+    the frame downscaled to ~480px, then only the best scale is matched at
+    full resolution inside a small window around the coarse hit.
+    """
+
+    # Downscale the frame so its longest side is about _COARSE_MAX_SIDE,
+    # keeping the smallest template large enough to still carry structure
+    fh, fw = frame_gray.shape[:2]
+    min_logo_side = min(logo_pyramid.gray.shape[:2]) * min(logo_pyramid.scale_factors)
+    pyramid_factor = min(1.0, _COARSE_MAX_SIDE / max(fh, fw))
+    pyramid_factor = min(1.0, max(pyramid_factor, _MIN_COARSE_TEMPLATE_SIDE / min_logo_side))
+
+    coarse_frame = frame_gray
+    if pyramid_factor < 1.0:
+        coarse_frame = cv2.resize(
+            frame_gray,
+            (0, 0),
+            fx=pyramid_factor,
+            fy=pyramid_factor,
+            interpolation=cv2.INTER_AREA,
+        )
+
+    coarse = _search_scales(coarse_frame, logo_pyramid, pyramid_factor)
+    if coarse is None:
+        return None
+
+    confidence, scale, (cx, cy) = coarse
+    top_left = (int(round(cx / pyramid_factor)), int(round(cy / pyramid_factor)))
+
+    resized_logo = logo_pyramid.templates[scale]
+    th, tw = resized_logo.shape[:2]
+
+    if pyramid_factor < 1.0:
+        # Refine at full resolution within a few coarse pixels of the hit
+        margin = int(math.ceil(2 / pyramid_factor))
+        x0 = max(top_left[0] - margin, 0)
+        y0 = max(top_left[1] - margin, 0)
+        x1 = min(top_left[0] + tw + margin, fw)
+        y1 = min(top_left[1] + th + margin, fh)
+
+        if th <= y1 - y0 and tw <= x1 - x0:
+            roi = frame_gray[y0:y1, x0:x1]
+            result = cv2.matchTemplate(roi, resized_logo, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            confidence = float(max_val)
+            top_left = (x0 + max_loc[0], y0 + max_loc[1])
+
+    best_match = _TemplateMatchResult(
+        confidence=confidence,
+        top_left=top_left,
+        bottom_right=(top_left[0] + tw, top_left[1] + th),
+        method="template",
+    )
 
-    if best_match and best_match.confidence >= 0.55:
+    if best_match.confidence >= 0.55:
         return best_match
 
     return None
@@ -134,13 +376,19 @@ def _run_template_matching(
 
 def _create_detection_from_match(
     match: _TemplateMatchResult,
-    frame: np.ndarray,
+    frame_shape: Tuple[int, ...],
     frame_number: int,
     timestamp: float,
+    frame: Optional[np.ndarray] = None,
 ) -> DetectedLogo:
-    """Convert a template match into a DetectedLogo with a cropped image."""
+    """
+    Convert a template match into a DetectedLogo.
+
+    The crop is only JPEG-encoded when the colour ``frame`` is given;
+    otherwise callers can cut it from the original frame using the bounding box.
+    """
 
-    fh, fw = frame.shape[:2]
+    fh, fw = frame_shape[:2]
     x1, y1 = match.top_left
     x2, y2 = match.bottom_right
     x2 = min(x2, fw - 1)
@@ -149,8 +397,10 @@ def _create_detection_from_match(
     width = max(x2 - x1, 1)
     height = max(y2 - y1, 1)
 
-    crop = frame[y1:y1 + height, x1:x1 + width]
-    crop_base64 = _encode_image_to_base64(crop)
+    crop_base64: Optional[str] = None
+    if frame is not None:
+        crop = frame[y1:y1 + height, x1:x1 + width]
+        crop_base64 = _encode_image_to_base64(crop)
 
     bbox = LogoBoundingBox(
         x=x1 / fw,
@@ -170,6 +420,159 @@ def _create_detection_from_match(
     )
 
 
+def _get_clip() -> Tuple[Any, str]:
+    """
+    Return the process-wide CLIP model and device, loading them on first use.
+
+    On CUDA, weights are cast to FP16 in channels-last layout. Raises
+    ImportError when the CLIP dependencies are missing.
+    """
+
+    with _CLIP_LOCK:
+        if _CLIP_STATE["model"] is None:
+            import torch  # type: ignore
+            from transformers import CLIPModel  # type: ignore
+
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            model = CLIPModel.from_pretrained(_CLIP_MODEL_NAME).to(device)
+            if device == "cuda":
+                # FP16 weights and NHWC layout let cuDNN pick its fastest kernels
+                model = model.half().to(memory_format=torch.channels_last)
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
+                torch.backends.cudnn.benchmark = True
+            model.eval()
+
+            _CLIP_STATE["device"] = device
+            _CLIP_STATE["model"] = model
+
+        return _CLIP_STATE["model"], _CLIP_STATE["device"]
+
+
+def _get_clip_onnx_session() -> Optional[Any]:
+    """
+    Return the ONNX Runtime session for the exported CLIP image encoder.
+
+    Returns None unless ``CLIP_ONNX_MODEL_PATH`` points to an existing model
+    (see ``scripts/export_clip_onnx.py``) and onnxruntime is installed.
+    """
+
+    model_path = os.getenv("CLIP_ONNX_MODEL_PATH")
+    if not model_path or not os.path.isfile(model_path):
+        return None
+
+    try:
+        import onnxruntime as ort  # type: ignore
+    except ImportError:
+        return None
+
+    with _CLIP_LOCK:
+        if _CLIP_STATE["onnx_session"] is None:
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+            available = ort.get_available_providers()
+            providers = [
+                provider
+                for provider in ("CUDAExecutionProvider", "CPUExecutionProvider")
+                if provider in available
+            ]
+
+            _CLIP_STATE["onnx_session"] = ort.InferenceSession(
+                model_path,
+                sess_options=options,
+                providers=providers,
+            )
+
+        return _CLIP_STATE["onnx_session"]
+
+
+def _preprocess_clip(images: List[np.ndarray]) -> np.ndarray:
+    """
+    Turn BGR images into a CLIP ``pixel_values`` batch (N, 3, 224, 224).
+
+    Mirrors CLIPProcessor (shortest side resized to 224, center crop, RGB,
+    CLIP mean/std normalisation) with OpenCV and NumPy instead of PIL.
+    """
+
+    size = _CLIP_IMAGE_SIZE
+    batch = np.empty((len(images), size, size, 3), dtype=np.float32)
+
+    for idx, image in enumerate(images):
+        height, width = image.shape[:2]
+        scale = size / min(height, width)
+        resized = cv2.resize(
+            image,
+            (max(size, round(width * scale)), max(size, round(height * scale))),
+            interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC,
+        )
+        top = (resized.shape[0] - size) // 2
+        left = (resized.shape[1] - size) // 2
+        # Reverse the channel axis (BGR -> RGB) while copying into the batch
+        batch[idx] = resized[top:top + size, left:left + size, ::-1]
+
+    batch *= 1.0 / 255.0
+    batch -= _CLIP_MEAN
+    batch /= _CLIP_STD
+    return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+
+def _encode_images_torch(model: Any, device: str, pixel_values: np.ndarray) -> np.ndarray:
+    """Encode a pixel batch with the PyTorch CLIP model into normalised float32 features."""
+
+    import torch  # type: ignore
+
+    with torch.inference_mode():
+        inputs = torch.from_numpy(pixel_values).to(
+            device=device, dtype=model.dtype, non_blocking=True
+        )
+        if device == "cuda":
+            inputs = inputs.to(memory_format=torch.channels_last)
+        features = model.get_image_features(pixel_values=inputs)
+        features = torch.nn.functional.normalize(features, dim=-1)
+
+    return features.float().cpu().numpy()
+
+
+def _encode_images_onnx(session: Any, pixel_values: np.ndarray) -> np.ndarray:
+    """Encode a pixel batch with the ONNX CLIP image encoder into normalised float32 features."""
+
+    model_input = session.get_inputs()[0]
+    dtype = np.float16 if model_input.type == "tensor(float16)" else np.float32
+
+    features = session.run(
+        ["image_embeds"],
+        {model_input.name: pixel_values.astype(dtype, copy=False)},
+    )[0].astype(np.float32)
+
+    return features / np.linalg.norm(features, axis=-1, keepdims=True)
+
+
+def _get_logo_features(
+    logo: np.ndarray,
+    backend: str,
+    encode: Callable[[np.ndarray], np.ndarray],
+) -> np.ndarray:
+    """Return normalised CLIP features for the logo, cached by a hash of its pixels."""
+
+    key = f"{backend}:{hashlib.sha256(logo.tobytes()).hexdigest()}:{logo.shape}"
+
+    with _CLIP_LOCK:
+        cached = _LOGO_FEATURE_CACHE.get(key)
+        if cached is not None:
+            _LOGO_FEATURE_CACHE.move_to_end(key)
+            return cached
+
+    logo_features = encode(_preprocess_clip([logo]))
+
+    with _CLIP_LOCK:
+        _LOGO_FEATURE_CACHE[key] = logo_features
+        while len(_LOGO_FEATURE_CACHE) > _LOGO_FEATURE_CACHE_SIZE:
+            _LOGO_FEATURE_CACHE.popitem(last=False)
+
+    return logo_features
+
+
 def _try_clip_similarity(
     frames: List[np.ndarray],
     logo: np.ndarray,
@@ -177,55 +580,47 @@ def _try_clip_similarity(
     """
     Attempt to score frames using CLIP image embeddings.
 
+    Uses the exported ONNX image encoder when one is configured, otherwise
+    the PyTorch model.
+
     Returns:
         A list of (frame_index, similarity) sorted descending, and an optional warning.
     """
 
-    prefer_clip = os.getenv("ENABLE_CLIP_LOGO", "true").lower() in {"1", "true", "yes", "on"}
-
-    if not prefer_clip:
-        return [], "CLIP scoring disabled via ENABLE_CLIP_LOGO flag."
+    encode: Callable[[np.ndarray], np.ndarray]
 
     try:
-        import torch  # type: ignore
-        from PIL import Image  # type: ignore
-        from transformers import CLIPModel, CLIPProcessor  # type: ignore
+        session = _get_clip_onnx_session()
+        if session is not None:
+            backend = "onnx"
+            encode = partial(_encode_images_onnx, session)
+        else:
+            backend = "torch"
+            model, device = _get_clip()
+            encode = partial(_encode_images_torch, model, device)
     except ImportError:
         return [], (
-            "CLIP dependencies (torch, transformers, Pillow) are not installed; "
+            "CLIP dependencies (torch, transformers) are not installed; "
             "skipping similarity scoring."
         )
-
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-
-    try:
-        model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32").to(device)
-        processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
     except Exception as exc:  # noqa: BLE001
         logger.warning("Failed to load CLIP model: %s", exc)
         return [], f"Failed to load CLIP model: {exc}"
 
-    logo_rgb = cv2.cvtColor(logo, cv2.COLOR_BGR2RGB)
-    logo_image = Image.fromarray(logo_rgb)
-
-    with torch.no_grad():
-        logo_inputs = processor(images=logo_image, return_tensors="pt").to(device)
-        logo_features = model.get_image_features(**logo_inputs)
-        logo_features /= logo_features.norm(dim=-1, keepdim=True)
+    logo_features = _get_logo_features(logo, backend, encode)
 
-    scores: List[Tuple[int, float]] = []
+    similarities: List[float] = []
 
-    for idx, frame in enumerate(frames):
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame_image = Image.fromarray(frame_rgb)
+    # Encode frames in batches: one forward pass per batch instead of per
+    # frame, bounded so large frame sets do not exhaust device memory
+    for start in range(0, len(frames), _CLIP_BATCH_SIZE):
+        pixel_values = _preprocess_clip(frames[start:start + _CLIP_BATCH_SIZE])
+        frame_features = encode(pixel_values)
+        similarities.extend((frame_features @ logo_features.T).squeeze(-1).tolist())
 
-        with torch.no_grad():
-            frame_inputs = processor(images=frame_image, return_tensors="pt").to(device)
-            frame_features = model.get_image_features(**frame_inputs)
-            frame_features /= frame_features.norm(dim=-1, keepdim=True)
-
-        similarity = (logo_features @ frame_features.T).cpu().item()
-        scores.append((idx, float(similarity)))
+    scores: List[Tuple[int, float]] = [
+        (idx, float(similarity)) for idx, similarity in enumerate(similarities)
+    ]
 
     scores.sort(key=lambda item: item[1], reverse=True)
 
@@ -238,34 +633,55 @@ def run_logo_detection(request: LogoDetectionRequest) -> LogoDetectionResult:
     warnings: List[str] = []
 
     try:
-        logo_image = _decode_base64_image(request.brand_logo_base64)
+        logo_image = decode_base64_image(request.brand_logo_base64)
     except ValueError as exc:
         raise ValueError(f"Invalid brand logo: {exc}") from exc
 
-    frames_with_images: List[Tuple[int, float, np.ndarray, str]] = []
-
-    for frame in request.frames:
+    def _decode_frame(frame: ExtractedFrame) -> Tuple[Optional[np.ndarray], Optional[str]]:
+        # Template matching only needs luminance, so frames are decoded
+        # straight to grayscale; colour is decoded later for crops and CLIP
         try:
-            frame_image = _decode_base64_image(frame.image_base64)
-            frames_with_images.append(
-                (frame.frame_number, frame.timestamp, frame_image, frame.image_base64)
-            )
+            return decode_base64_image(frame.image_base64, color=False), None
         except ValueError as exc:
-            warnings.append(f"Failed to decode frame {frame.frame_number}: {exc}")
+            return None, f"Failed to decode frame {frame.frame_number}: {exc}"
+
+    # Decoded frames keep the index of their request frame instead of a copy
+    # of the base64 payload, which is only decoded again in colour for crops
+    # and CLIP
+    frames_with_images: List[Tuple[int, int, float, np.ndarray]] = []
+
+    decoded_frames = _FRAME_EXECUTOR.map(_decode_frame, request.frames)
+    for index, (frame, (frame_image, error)) in enumerate(zip(request.frames, decoded_frames)):
+        if frame_image is None:
+            warnings.append(error)
+            continue
+        frames_with_images.append((index, frame.frame_number, frame.timestamp, frame_image))
 
     if not frames_with_images:
         raise ValueError("No valid frames provided for logo detection")
 
     template_detections: List[DetectedLogo] = []
 
-    for frame_number, timestamp, frame_image, _ in frames_with_images:
-        match = _run_template_matching(frame_image, logo_image)
+    logo_pyramid = _prepare_logo_pyramid(logo_image)
+
+    # Frames are matched concurrently; OpenCV releases the GIL while matching
+    matches = _FRAME_EXECUTOR.map(
+        lambda item: _run_template_matching(item[3], logo_pyramid),
+        frames_with_images,
+    )
+
+    for (index, frame_number, timestamp, frame_image), match in zip(frames_with_images, matches):
         if match:
             detection = _create_detection_from_match(
                 match=match,
-                frame=frame_image,
+                frame_shape=frame_image.shape,
                 frame_number=frame_number,
                 timestamp=timestamp,
+                frame=(
+                    decode_base64_image(request.frames[index].image_base64)
+                    if request.include_crop_image
+                    else None
+                ),
             )
             template_detections.append(detection)
 
@@ -285,9 +701,17 @@ def run_logo_detection(request: LogoDetectionRequest) -> LogoDetectionResult:
     clip_scores: List[Tuple[int, float]] = []
     clip_warning: Optional[str] = None
 
-    if request.prefer_clip:
+    if request.prefer_clip and not ENABLE_CLIP_LOGO:
+        # Checked before decoding colour frames that CLIP would never see
+        warnings.append("CLIP scoring disabled via ENABLE_CLIP_LOGO flag.")
+    elif request.prefer_clip:
         clip_scores, clip_warning = _try_clip_similarity(
-            frames=[frame for _, _, frame, _ in frames_with_images],
+            frames=list(
+                _FRAME_EXECUTOR.map(
+                    lambda item: decode_base64_image(request.frames[item[0]].image_base64),
+                    frames_with_images,
+                )
+            ),
             logo=logo_image,
         )
         if clip_warning:
@@ -298,7 +722,7 @@ def run_logo_detection(request: LogoDetectionRequest) -> LogoDetectionResult:
     if clip_scores:
         top_scores = [item for item in clip_scores if item[1] >= 0.25][:3]
         for frame_idx, similarity in top_scores:
-            frame_number, timestamp, frame_image, frame_base64 = frames_with_images[frame_idx]
+            index, frame_number, timestamp, _ = frames_with_images[frame_idx]
             clip_detections.append(
                 DetectedLogo(
                     frameNumber=frame_number,
@@ -306,7 +730,11 @@ def run_logo_detection(request: LogoDetectionRequest) -> LogoDetectionResult:
                     method="clip",
                     confidence=round(float(similarity), 3),
                     boundingBox=None,
-                    cropImageBase64=frame_base64,
+                    cropImageBase64=(
+                        request.frames[index].image_base64
+                        if request.include_crop_image
+                        else None
+                    ),
                     notes="High similarity to reference logo via CLIP embeddings.",
                 )
             )
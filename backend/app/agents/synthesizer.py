@@ -10,12 +10,14 @@ from __future__ import annotations
 import json
 import logging
 import os
-from typing import Any, Dict
-
-from google.genai.types import GenerateContentResponse
+import re
+from typing import TYPE_CHECKING, Any, Dict
 
 from ..schemas.critique import SynthesizerRequest, SynthesizerResult
-from ..services.gemini import get_genai_client
+from ..services.gemini import dump_json_compact, get_genai_client, json_loads
+
+if TYPE_CHECKING:  # only needed for annotations
+    from google.genai.types import GenerateContentResponse
 
 logger = logging.getLogger(__name__)
 
@@ -27,26 +29,32 @@ USE_DUMMY_SYNTHESIZER = os.getenv("USE_DUMMY_SYNTHESIZER", "false").lower() in {
     "on",
 }
 
+# JSON object inside a Markdown fence, and the outermost braces of a bare reply
+_FENCED_JSON_PATTERN = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+_BRACED_JSON_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+
 
 def _extract_response_text(response: GenerateContentResponse) -> str:
     """
     Attempt to extract textual payload from a Gemini response.
 
-    The SDK can return data in multiple shapes. This helper tries the most
-    common paths and concatenates multiple parts when present.
+    ``response.text`` covers the common case; otherwise the candidate parts
+    are walked once and concatenated. Objects without the expected shape
+    yield "".
     """
-    text_parts = []
-
-    if hasattr(response, "text") and response.text:
-        text_parts.append(response.text)
-    elif hasattr(response, "candidates") and response.candidates:
-        for candidate in response.candidates:
-            if hasattr(candidate, "content") and hasattr(candidate.content, "parts"):
-                for part in candidate.content.parts:
-                    if hasattr(part, "text") and part.text:
-                        text_parts.append(part.text)
-
-    return "".join(text_parts)
+    try:
+        text = response.text
+        if text:
+            return text
+        return "".join(
+            part.text
+            for candidate in response.candidates or ()
+            if candidate.content
+            for part in candidate.content.parts or ()
+            if part.text
+        )
+    except AttributeError:
+        return ""
 
 
 def _parse_json_response(text: str) -> Dict[str, Any]:
@@ -61,18 +69,16 @@ def _parse_json_response(text: str) -> Dict[str, Any]:
             "recommendations": [],
         }
 
-    import re  # local import to avoid module-level dependency
-
-    json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.DOTALL)
+    json_match = _FENCED_JSON_PATTERN.search(text)
     if json_match:
         text = json_match.group(1)
 
-    json_match = re.search(r"\{.*\}", text, re.DOTALL)
+    json_match = _BRACED_JSON_PATTERN.search(text)
     if json_match:
         text = json_match.group(0)
 
     try:
-        return json.loads(text)
+        return json_loads(text)
     except json.JSONDecodeError:
         logger.warning("Synthesizer received non-JSON response, returning fallback structure")
         return {
@@ -83,6 +89,27 @@ def _parse_json_response(text: str) -> Dict[str, Any]:
         }
 
 
+_PROMPT_FOOTER = (
+    "Return a JSON object with the following structure:\n"
+    "{\n"
+    '  "combinedSummary": string,\n'
+    '  "brandAlignment": {\n'
+    '    "score": number (0-1),\n'
+    '    "narrative": string\n'
+    "  },\n"
+    '  "visualIdentity": {\n'
+    '    "score": number (0-1),\n'
+    '    "narrative": string\n'
+    "  },\n"
+    '  "keyInsights": [string],\n'
+    '  "risks": [string],\n'
+    '  "recommendations": [string]\n'
+    "}\n"
+    "Ensure the language is polished, non-repetitive, and actionable. "
+    "If a numeric score is unavailable, estimate one based on the provided context."
+)
+
+
 def _build_prompt(request: SynthesizerRequest) -> str:
     """Construct the prompt for the synthesizer agent."""
     brand = request.brand_context
@@ -90,9 +117,9 @@ def _build_prompt(request: SynthesizerRequest) -> str:
     product = brand.product_name
     brief = brand.brief_prompt or ""
 
-    overall_report_str = json.dumps(request.overall_report, indent=2)
-    visual_report_str = json.dumps(request.visual_report, indent=2)
-    audio_report_str = json.dumps(request.audio_report, indent=2) if request.audio_report else None
+    overall_report_str = dump_json_compact(request.overall_report)
+    visual_report_str = dump_json_compact(request.visual_report)
+    audio_report_str = dump_json_compact(request.audio_report) if request.audio_report else None
 
     agents_summary = "Two upstream agents" if not audio_report_str else "Three upstream agents"
     audio_section = ""
@@ -113,24 +140,7 @@ def _build_prompt(request: SynthesizerRequest) -> str:
         f"{overall_report_str}\n\n"
         "Visual Style Agent Report (JSON):\n"
         f"{visual_report_str}\n{audio_section}"
-        "Return a JSON object with the following structure:\n"
-        "{\n"
-        '  "combinedSummary": string,\n'
-        '  "brandAlignment": {\n'
-        '    "score": number (0-1),\n'
-        '    "narrative": string\n'
-        "  },\n"
-        '  "visualIdentity": {\n'
-        '    "score": number (0-1),\n'
-        '    "narrative": string\n'
-        "  },\n"
-        '  "keyInsights": [string],\n'
-        '  "risks": [string],\n'
-        '  "recommendations": [string]\n'
-        "}\n"
-        "Ensure the language is polished, non-repetitive, and actionable. "
-        "If a numeric score is unavailable, estimate one based on the provided context."
-    )
+    ) + _PROMPT_FOOTER
 
 
 def run_synthesizer(request: SynthesizerRequest) -> SynthesizerResult:
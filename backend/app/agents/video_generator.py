@@ -4,8 +4,9 @@ Agent responsible for generating Veo3 videos using prompt text and reference ima
 
 from __future__ import annotations
 
-import base64
+import asyncio
 import logging
+import random
 import time
 from typing import Tuple
 
@@ -13,8 +14,14 @@ from fastapi import HTTPException
 from google.genai import types as genai_types
 from google.genai.errors import ClientError
 
+try:
+    import pybase64 as base64  # type: ignore
+except ImportError:  # pybase64 is an optional SIMD speed-up; fall back to stdlib base64
+    import base64
+
 from ..schemas.video import VideoGenerationRequest, VideoGenerationResult
 from ..services.gemini import get_genai_client
+from ..services.media import Base64DataUriWriter
 
 logger = logging.getLogger(__name__)
 
@@ -38,15 +45,39 @@ def _decode_base64(data: str) -> bytes:
         raise ValueError("Invalid base64 payload") from exc
 
 
-def _poll_and_download_video(
-    client, operation, prompt_text: str, max_attempts: int = 60
+def _download_video_data_uri(client, video_file) -> str:
+    """
+    Download a generated video straight into a ``data:video/mp4`` URI.
+
+    The SDK streams the download into a Base64DataUriWriter, so the raw MP4
+    is encoded chunk by chunk and never held in memory as a whole.
+    """
+    writer = Base64DataUriWriter("video/mp4")
+    client.files.download(file=video_file, destination=writer)
+
+    if not writer.bytes_written:
+        raise ValueError("Downloaded video data is empty.")
+
+    return writer.getvalue()
+
+
+async def _poll_and_download_video(
+    client, operation, prompt_text: str, max_wait_seconds: float = 600.0
 ) -> VideoGenerationResult:
-    """Poll for video generation completion and download the result."""
+    """
+    Poll for video generation completion and download the result.
+
+    Waiting happens on the event loop and the blocking SDK calls run in worker
+    threads, so a generation does not hold a thread while it is polled.
+    """
+    deadline = time.monotonic() + max_wait_seconds
     poll_attempts = 0
 
-    while not getattr(operation, "done", False) and poll_attempts < max_attempts:
-        time.sleep(10)
-        operation = client.operations.get(operation.name)
+    while not getattr(operation, "done", False) and time.monotonic() < deadline:
+        # Back off from 2 s to 15 s with a little jitter, so short generations
+        # are picked up quickly without polling long ones more often
+        await asyncio.sleep(min(15.0, 2.0 * (1.25 ** poll_attempts)) + random.uniform(0, 0.5))
+        operation = await asyncio.to_thread(client.operations.get, operation.name)
         poll_attempts += 1
         logger.debug("Video generation polling attempt %d", poll_attempts)
 
@@ -65,34 +96,14 @@ def _poll_and_download_video(
 
     logger.info("Downloading generated video file %s", getattr(video_file, "name", "unknown"))
 
-    # Download the file into memory
-    download_response = client.files.download(name=video_file.name)
-
-    if download_response is None:
-        raise ValueError("Failed to download generated video data.")
-
-    if hasattr(download_response, "read"):
-        video_bytes = download_response.read()
-    elif hasattr(download_response, "data"):
-        video_bytes = download_response.data
-    elif isinstance(download_response, bytes):
-        video_bytes = download_response
-    else:
-        raise ValueError("Unexpected response type from files.download()")
-
-    if not video_bytes:
-        raise ValueError("Downloaded video data is empty.")
-
-    video_base64 = base64.b64encode(video_bytes).decode("utf-8")
-
     return VideoGenerationResult(
-        video=f"data:video/mp4;base64,{video_base64}",
+        video=await asyncio.to_thread(_download_video_data_uri, client, video_file),
         prompt_text=prompt_text,
         warnings=[],
     )
 
 
-def run_video_generation(request: VideoGenerationRequest) -> VideoGenerationResult:
+async def run_video_generation(request: VideoGenerationRequest) -> VideoGenerationResult:
     """Generate a video using Veo3 with the supplied prompt and reference images."""
     client = get_genai_client()
     aspect_ratio = request.aspect_ratio or "16:9"
@@ -140,7 +151,8 @@ def run_video_generation(request: VideoGenerationRequest) -> VideoGenerationResu
         logger.info("Starting video generation with %d reference images...", len(reference_images))
         
         try:
-            operation = client.models.generate_videos(
+            operation = await asyncio.to_thread(
+                client.models.generate_videos,
                 model="veo-3.1-generate-preview",
                 prompt=request.prompt_text,
                 config=genai_types.GenerateVideosConfig(
@@ -150,7 +162,7 @@ def run_video_generation(request: VideoGenerationRequest) -> VideoGenerationResu
             )
             logger.info("Video generation operation started: %s", operation.name if hasattr(operation, "name") else operation)
             
-            return _poll_and_download_video(client, operation, request.prompt_text)
+            return await _poll_and_download_video(client, operation, request.prompt_text)
             
         except ClientError as e:
             # Check if it's a RESOURCE_EXHAUSTED error (429)
@@ -174,7 +186,8 @@ def run_video_generation(request: VideoGenerationRequest) -> VideoGenerationResu
                 )
                 
                 # Fallback: generate without reference images using older model
-                operation = client.models.generate_videos(
+                operation = await asyncio.to_thread(
+                    client.models.generate_videos,
                     model="veo-3.0-fast-generate-preview",
                     prompt=request.prompt_text,
                     config=genai_types.GenerateVideosConfig(
@@ -186,7 +199,7 @@ def run_video_generation(request: VideoGenerationRequest) -> VideoGenerationResu
                     operation.name if hasattr(operation, "name") else operation
                 )
                 
-                result = _poll_and_download_video(client, operation, request.prompt_text)
+                result = await _poll_and_download_video(client, operation, request.prompt_text)
                 # Add a warning to indicate fallback was used
                 result.warnings = [
                     "Video generated using fallback method (veo-3.0 without reference images) "
@@ -7,32 +7,40 @@ from __future__ import annotations
 import json
 import logging
 import re
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 from google.genai.types import GenerateContentResponse
 
 from ..schemas.video import VideoPromptRequest, VideoPromptResult
-from ..services.gemini import get_genai_client
+from ..services.gemini import get_genai_client, json_loads
 
 logger = logging.getLogger(__name__)
 
+_FENCE_HEAD_PATTERN = re.compile(r"^```(?:json)?\s*")
+_FENCE_TAIL_PATTERN = re.compile(r"\s*```$")
 
-def _extract_response_text(response: GenerateContentResponse) -> str:
-    """Extract plain text from a Gemini response."""
-    if hasattr(response, "text") and response.text:
-        return response.text
 
-    if getattr(response, "candidates", None):
-        for candidate in response.candidates:
-            if getattr(candidate, "content", None):
-                for part in getattr(candidate.content, "parts", []):
-                    if getattr(part, "text", None):
-                        return part.text
-            if getattr(candidate, "text", None):
-                return candidate.text
+def _strip_code_fences(text: str) -> str:
+    """Remove a leading/trailing markdown code fence from LLM output."""
+    return _FENCE_TAIL_PATTERN.sub("", _FENCE_HEAD_PATTERN.sub("", text))
 
-    if hasattr(response, "__dict__") and "text" in response.__dict__:
-        return response.__dict__["text"]
+
+def _extract_response_text(response: GenerateContentResponse) -> str:
+    """Extract plain text from a Gemini response."""
+    text = getattr(response, "text", None)
+    if text:
+        return text
+
+    for candidate in getattr(response, "candidates", None) or ():
+        content = getattr(candidate, "content", None)
+        parts = (getattr(content, "parts", None) or ()) if content else ()
+        for part in parts:
+            text = getattr(part, "text", None)
+            if text:
+                return text
+        text = getattr(candidate, "text", None)
+        if text:
+            return text
 
     return ""
 
@@ -45,21 +53,54 @@ def _parse_prompt_json(text: str) -> Dict[str, Any]:
     cleaned = text.strip()
 
     # Remove markdown code fences if present
-    cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned)
-    cleaned = re.sub(r"\s*```$", "", cleaned)
+    cleaned = _strip_code_fences(cleaned)
 
-    # Extract JSON object
-    match = re.search(r"\{[\s\S]*\}", cleaned)
-    if match:
-        cleaned = match.group(0)
+    # Extract JSON object (first "{" through last "}")
+    json_start = cleaned.find("{")
+    json_end = cleaned.rfind("}")
+    if json_start != -1 and json_end > json_start:
+        cleaned = cleaned[json_start : json_end + 1]
 
     try:
-        return json.loads(cleaned)
+        return json_loads(cleaned)
     except json.JSONDecodeError as exc:
         logger.error("Failed to decode prompt JSON: %s", cleaned)
         raise ValueError("Gemini returned invalid JSON for video prompt") from exc
 
 
+# (key, template) pairs for prompt fields rendered as a single sentence, in
+# output order; fields needing special handling stay inline in _prompt_to_text
+_STORY_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("hook", "Hook (0-2s): {}."),
+    ("development", "Development (2-6s): {}."),
+    ("climax", "Climax (6-9s): {}."),
+    ("resolution", "Resolution (9-10s): {}."),
+)
+_SCENE_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("style", "Visual style: {}."),
+    ("camera", "Camera: {}."),
+    ("lenses", "Lens: {}."),
+    ("lighting", "Lighting: {}."),
+    ("background", "Background: {}."),
+    ("foreground", "Foreground: {}."),
+)
+_INTEGRATION_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("motion", "Motion and animation: {}."),
+    ("logoIntegration", "{}"),
+    ("productIntegration", "{}"),
+)
+
+
+def _append_fields(
+    parts: list[str], source: Dict[str, Any], fields: Tuple[Tuple[str, str], ...]
+) -> None:
+    """Append the formatted sentence for each truthy field in ``fields``."""
+    for key, template in fields:
+        value = source.get(key)
+        if value:
+            parts.append(template.format(value))
+
+
 def _prompt_to_text(prompt: Dict[str, Any]) -> str:
     """Generate a rich text prompt from the structured Veo3 prompt."""
     parts: list[str] = []
@@ -69,15 +110,8 @@ def _prompt_to_text(prompt: Dict[str, Any]) -> str:
         parts.append(description)
 
     story_structure = prompt.get("storyStructure") or {}
-    stories = []
-    if hook := story_structure.get("hook"):
-        stories.append(f"Hook (0-2s): {hook}.")
-    if development := story_structure.get("development"):
-        stories.append(f"Development (2-6s): {development}.")
-    if climax := story_structure.get("climax"):
-        stories.append(f"Climax (6-9s): {climax}.")
-    if resolution := story_structure.get("resolution"):
-        stories.append(f"Resolution (9-10s): {resolution}.")
+    stories: list[str] = []
+    _append_fields(stories, story_structure, _STORY_FIELDS)
     if stories:
         parts.append(" ".join(stories))
 
@@ -98,29 +132,7 @@ def _prompt_to_text(prompt: Dict[str, Any]) -> str:
         if beats_text:
             parts.append(f"Story beats: {beats_text}")
 
-    style = prompt.get("style")
-    if style:
-        parts.append(f"Visual style: {str(style)}.")
-
-    camera = prompt.get("camera")
-    if camera:
-        parts.append(f"Camera: {str(camera)}.")
-
-    lenses = prompt.get("lenses")
-    if lenses:
-        parts.append(f"Lens: {str(lenses)}.")
-
-    lighting = prompt.get("lighting")
-    if lighting:
-        parts.append(f"Lighting: {str(lighting)}.")
-
-    background = prompt.get("background")
-    if background:
-        parts.append(f"Background: {str(background)}.")
-
-    foreground = prompt.get("foreground")
-    if foreground:
-        parts.append(f"Foreground: {str(foreground)}.")
+    _append_fields(parts, prompt, _SCENE_FIELDS)
 
     elements = prompt.get("elements") or []
     if elements and isinstance(elements, list):
@@ -130,17 +142,7 @@ def _prompt_to_text(prompt: Dict[str, Any]) -> str:
     if visual_metaphors and isinstance(visual_metaphors, list):
         parts.append(f"Visual metaphors: {', '.join(str(v) for v in visual_metaphors)}.")
 
-    motion = prompt.get("motion")
-    if motion:
-        parts.append(f"Motion and animation: {str(motion)}.")
-
-    logo_integration = prompt.get("logoIntegration")
-    if logo_integration:
-        parts.append(str(logo_integration))
-
-    product_integration = prompt.get("productIntegration")
-    if product_integration:
-        parts.append(str(product_integration))
+    _append_fields(parts, prompt, _INTEGRATION_FIELDS)
 
     dialogue = prompt.get("dialogue") or []
     if dialogue and isinstance(dialogue, list):
@@ -304,9 +306,7 @@ def run_video_prompt(request: VideoPromptRequest) -> VideoPromptResult:
     response_text = _extract_response_text(response)
     
     # Clean markdown code fences if present, but keep the JSON as-is
-    cleaned = response_text.strip()
-    cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned)
-    cleaned = re.sub(r"\s*```$", "", cleaned)
+    cleaned = _strip_code_fences(response_text.strip())
     
     # Return the raw JSON string
     logger.info("Returning raw JSON prompt (length: %d chars)", len(cleaned))
@@ -0,0 +1,67 @@
+"""
+Combined overall critic and safety and ethics review.
+
+Both agents critique the same video, so the video is decoded, uploaded and
+polled until ACTIVE once, and the two Gemini prompts then run concurrently
+against the shared file.
+"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from ..schemas.critique import (
+    OverallCriticRequest,
+    SafetyEthicsRequest,
+    VideoReviewRequest,
+    VideoReviewResult,
+)
+from ..services.gemini import get_genai_client, upload_base64_video
+from .overall_critic import (
+    USE_DUMMY_OVERALL_CRITIC,
+    run_overall_critic,
+    run_overall_critic_on_upload,
+)
+from .safety_ethics import (
+    USE_DUMMY_SAFETY_ETHICS,
+    run_safety_ethics,
+    run_safety_ethics_on_upload,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def run_video_review(request: VideoReviewRequest) -> VideoReviewResult:
+    """Execute the overall critic and safety and ethics agents on one upload."""
+
+    overall_request = OverallCriticRequest(
+        videoBase64=request.video_base64,
+        brandContext=request.brand_context,
+    )
+    safety_request = SafetyEthicsRequest(
+        videoBase64=request.video_base64,
+        brandContext=request.brand_context,
+    )
+
+    # The overall critic runs on its own thread while the request thread runs
+    # the safety prompt; the executor is per call so concurrent reviews never
+    # queue behind each other's Gemini latency
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="video-review") as executor:
+        if USE_DUMMY_OVERALL_CRITIC or USE_DUMMY_SAFETY_ETHICS:
+            # Dummy agents skip the upload, so let each handle its own request
+            overall_future = executor.submit(run_overall_critic, overall_request)
+            safety_result = run_safety_ethics(safety_request)
+        else:
+            client = get_genai_client()
+            uploaded_video = upload_base64_video(client, request.video_base64)
+
+            overall_future = executor.submit(
+                run_overall_critic_on_upload, client, overall_request, uploaded_video
+            )
+            safety_result = run_safety_ethics_on_upload(client, safety_request, uploaded_video)
+
+        return VideoReviewResult(
+            overall_critic=overall_future.result(),
+            safety_ethics=safety_result,
+        )
@@ -21,6 +21,7 @@ from google.genai.types import GenerateContentResponse
 
 from ..schemas.critique import VisualStyleRequest, VisualStyleResult
 from ..services.gemini import get_genai_client
+from ..services.media import strip_data_uri_prefix
 
 logger = logging.getLogger(__name__)
 
@@ -33,14 +34,6 @@ USE_DUMMY_VISUAL_STYLE = os.getenv("USE_DUMMY_VISUAL_STYLE", "false").lower() in
 }
 
 
-DATA_URI_PATTERN = re.compile(r"^data:.+;base64,")
-
-
-def _strip_data_uri_prefix(data: str) -> str:
-    """Remove data URI prefixes so the payload can be decoded."""
-    return DATA_URI_PATTERN.sub("", data)
-
-
 def _decode_base64(data: str) -> bytes:
     """Decode base64 data and raise a helpful error if it fails."""
     try:
@@ -218,7 +211,7 @@ def run_visual_style(request: VisualStyleRequest) -> VisualStyleResult:
         )
 
     # Decode video
-    stripped = _strip_data_uri_prefix(request.video_base64)
+    stripped = strip_data_uri_prefix(request.video_base64)
     decoded_bytes = _decode_base64(stripped)
 
     with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_video_file:
@@ -252,7 +245,7 @@ def run_visual_style(request: VisualStyleRequest) -> VisualStyleResult:
         # Add brand logo if provided
         if request.brand_logo_base64:
             try:
-                logo_stripped = _strip_data_uri_prefix(request.brand_logo_base64)
+                logo_stripped = strip_data_uri_prefix(request.brand_logo_base64)
                 logo_bytes = _decode_base64(logo_stripped)
                 with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_logo_file:
                     temp_logo_file.write(logo_bytes)
@@ -273,7 +266,7 @@ def run_visual_style(request: VisualStyleRequest) -> VisualStyleResult:
         # Add product image if provided
         if request.product_image_base64:
             try:
-                product_stripped = _strip_data_uri_prefix(request.product_image_base64)
+                product_stripped = strip_data_uri_prefix(request.product_image_base64)
                 product_bytes = _decode_base64(product_stripped)
                 with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_product_file:
                     temp_product_file.write(product_bytes)
@@ -7,6 +7,7 @@ from __future__ import annotations
 import logging
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
 from ...agents.overall_critic import run_overall_critic
 from ...agents.synthesizer import run_synthesizer
@@ -16,8 +17,9 @@ from ...agents.logo_detector import run_logo_detection
 from ...agents.color_harmony import run_color_harmony
 from ...agents.audio_analysis import run_audio_analysis
 from ...agents.safety_ethics import run_safety_ethics
+from ...agents.video_review import run_video_review
 from ...agents.message_clarity import run_message_clarity
-from ...agents.advisor_agent import run_advisor_agent
+from ...agents.advisor_agent import run_advisor_agent, run_advisor_agent_batch
 from ...schemas.critique import (
     AgentErrorResponse,
     FrameExtractionResult,
@@ -36,10 +38,14 @@ from ...schemas.critique import (
     AudioAnalysisResult,
     SafetyEthicsRequest,
     SafetyEthicsResult,
+    VideoReviewRequest,
+    VideoReviewResult,
     MessageClarityRequest,
     MessageClarityResult,
     AdvisorRequest,
     AdvisorResult,
+    AdvisorBatchRequest,
+    AdvisorBatchResult,
 )
 from ...agents.video_prompt import run_video_prompt
 from ...agents.video_generator import run_video_generation
@@ -71,7 +77,7 @@ async def overall_critic_endpoint(
     """
 
     try:
-        return run_overall_critic(payload)
+        return await run_in_threadpool(run_overall_critic, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -99,7 +105,7 @@ async def visual_style_endpoint(
     """
 
     try:
-        return run_visual_style(payload)
+        return await run_in_threadpool(run_visual_style, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -126,7 +132,7 @@ async def frame_extraction_endpoint(
     """
     
     try:
-        return run_frame_extraction(payload)
+        return await run_in_threadpool(run_frame_extraction, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -150,7 +156,7 @@ async def logo_detection_endpoint(
     """
 
     try:
-        return run_logo_detection(payload)
+        return await run_in_threadpool(run_logo_detection, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -170,7 +176,7 @@ async def video_prompt_endpoint(payload: VideoPromptRequest) -> VideoPromptResul
     """Generate a Veo3 prompt using Gemini."""
 
     try:
-        return run_video_prompt(payload)
+        return await run_in_threadpool(run_video_prompt, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -192,7 +198,7 @@ async def video_generation_endpoint(
     """Generate a Veo3 video from prompt text and reference images."""
 
     try:
-        return run_video_generation(payload)
+        return await run_video_generation(payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except TimeoutError as exc:
@@ -221,7 +227,7 @@ async def color_harmony_endpoint(
     """
 
     try:
-        return run_color_harmony(payload)
+        return await run_in_threadpool(run_color_harmony, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -248,7 +254,7 @@ async def audio_analysis_endpoint(
     """
     
     try:
-        return run_audio_analysis(payload)
+        return await run_in_threadpool(run_audio_analysis, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -275,7 +281,7 @@ async def synthesizer_endpoint(
     """
 
     try:
-        return run_synthesizer(payload)
+        return await run_in_threadpool(run_synthesizer, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -302,7 +308,7 @@ async def safety_ethics_endpoint(
     """
 
     try:
-        return run_safety_ethics(payload)
+        return await run_in_threadpool(run_safety_ethics, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -313,6 +319,33 @@ async def safety_ethics_endpoint(
         )
 
 
+@router.post(
+    "/video-review",
+    response_model=VideoReviewResult,
+    responses={400: {"model": AgentErrorResponse}},
+)
+async def video_review_endpoint(
+    payload: VideoReviewRequest,
+) -> VideoReviewResult:
+    """
+    Execute the overall critic and safety and ethics agents together.
+
+    The video is uploaded to Gemini once and both agents run concurrently
+    against it, instead of two sequential upload, poll and generate cycles.
+    """
+
+    try:
+        return await run_in_threadpool(run_video_review, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception:  # noqa: BLE001
+        logger.exception("Unexpected error while running video review")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to execute video review. Check backend logs.",
+        )
+
+
 @router.post(
     "/message-clarity",
     response_model=MessageClarityResult,
@@ -329,7 +362,7 @@ async def message_clarity_endpoint(
     """
 
     try:
-        return run_message_clarity(payload)
+        return await run_in_threadpool(run_message_clarity, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -357,7 +390,7 @@ async def advisor_endpoint(
     """
 
     try:
-        return run_advisor_agent(payload)
+        return await run_in_threadpool(run_advisor_agent, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:  # noqa: BLE001
@@ -366,3 +399,33 @@ async def advisor_endpoint(
             status_code=500,
             detail="Failed to execute advisor agent. Check backend logs.",
         )
+
+
+@router.post(
+    "/advisor/batch",
+    response_model=AdvisorBatchResult,
+    responses={400: {"model": AgentErrorResponse}},
+)
+async def advisor_batch_endpoint(
+    payload: AdvisorBatchRequest,
+) -> AdvisorBatchResult:
+    """
+    Execute the advisor agent for several ads.
+
+    Requests are grouped into shared Gemini calls of up to ``batchSize`` ads and
+    results are returned in request order.
+    """
+
+    try:
+        results = await run_in_threadpool(
+            run_advisor_agent_batch, payload.requests, payload.batch_size
+        )
+        return AdvisorBatchResult(results=results)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception:  # noqa: BLE001
+        logger.exception("Unexpected error while running advisor batch")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to execute advisor batch. Check backend logs.",
+        )
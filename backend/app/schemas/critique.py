@@ -9,7 +9,14 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field, field_validator, validator, ValidationInfo
+from pydantic import (
+    BaseModel,
+    Field,
+    ValidationInfo,
+    field_validator,
+    model_validator,
+    validator,
+)
 
 
 class BrandContext(BaseModel):
@@ -135,10 +142,14 @@ class FrameExtractionRequest(BaseModel):
     Attributes:
         video_base64: Base64-encoded video file
         frames_per_second: Number of frames to extract per second (default: 2.0)
+        max_side: Longest side in pixels of the returned frames; larger frames
+            are downscaled before encoding (default: 1024, ``None`` keeps the
+            source resolution)
     """
     
     video_base64: str = Field(..., alias="videoBase64")
     frames_per_second: Optional[float] = Field(2.0, alias="framesPerSecond")
+    max_side: Optional[int] = Field(1024, alias="maxSide", ge=64)
     
     class Config:
         populate_by_name = True
@@ -223,6 +234,7 @@ class LogoDetectionRequest(BaseModel):
     brand_context: BrandContext = Field(..., alias="brandContext")
     prefer_clip: bool = Field(True, alias="preferClip")
     use_gemini_fallback: bool = Field(True, alias="useGeminiFallback")
+    include_crop_image: bool = Field(False, alias="includeCropImage")
 
     class Config:
         populate_by_name = True
@@ -307,24 +319,97 @@ class AudioAnalysisRequest(BaseModel):
         video_base64: Base64-encoded content of the generated advertisement
             video. Data-URI prefixes are accepted and will be stripped
             automatically prior to processing.
+        video_uri: URI of a video Gemini can already read (e.g. a Files API
+            URI from a previous upload). When set, the video is referenced
+            directly and no base64 payload is needed.
+        video_mime_type: MIME type of the video referenced by ``video_uri``.
         brand_context: Additional brand information to help the agent evaluate
             audio alignment.
     """
     
-    video_base64: str = Field(..., alias="videoBase64")
+    video_base64: Optional[str] = Field(None, alias="videoBase64")
+    video_uri: Optional[str] = Field(None, alias="videoUri")
+    video_mime_type: str = Field("video/mp4", alias="videoMimeType")
     brand_context: BrandContext = Field(..., alias="brandContext")
     
     class Config:
         populate_by_name = True
     
     @validator("video_base64")
-    def validate_video(cls, value: str) -> str:
+    def validate_video(cls, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return value
         if not value:
             raise ValueError("video_base64 must not be empty")
         if len(value) < 100:
             raise ValueError("video_base64 payload appears to be too small")
         return value
 
+    @model_validator(mode="after")
+    def validate_video_source(self) -> "AudioAnalysisRequest":
+        if not self.video_base64 and not self.video_uri:
+            raise ValueError("Either video_base64 or video_uri must be provided")
+        return self
+
+
+class AudioToneOfVoice(BaseModel):
+    """Tone-of-voice section of the audio analysis report."""
+
+    score: float
+    analysis: str
+    characteristics: List[str]
+    brand_alignment: str = Field(..., alias="brandAlignment")
+
+    class Config:
+        populate_by_name = True
+
+
+class AudioMusic(BaseModel):
+    """Music section of the audio analysis report."""
+
+    score: float
+    analysis: str
+    style: str
+    volume: str
+    brand_alignment: str = Field(..., alias="brandAlignment")
+
+    class Config:
+        populate_by_name = True
+
+
+class AudioSoundEffects(BaseModel):
+    """Sound-effects section of the audio analysis report."""
+
+    score: float
+    analysis: str
+    presence: str
+    quality: str
+
+
+class AudioProductionQuality(BaseModel):
+    """Production-quality section of the audio analysis report."""
+
+    score: float
+    analysis: str
+    clarity: str
+    balance: str
+
+
+class AudioAnalysisReport(BaseModel):
+    """Response schema Gemini fills in for the audio analysis agent."""
+
+    tone_of_voice: AudioToneOfVoice = Field(..., alias="toneOfVoice")
+    music: AudioMusic
+    sound_effects: AudioSoundEffects = Field(..., alias="soundEffects")
+    audio_quality: AudioProductionQuality = Field(..., alias="audioQuality")
+    overall_audio_score: float = Field(..., alias="overallAudioScore")
+    key_strengths: List[str] = Field(..., alias="keyStrengths")
+    key_weaknesses: List[str] = Field(..., alias="keyWeaknesses")
+    recommendations: List[str]
+
+    class Config:
+        populate_by_name = True
+
 
 class AudioAnalysisResult(BaseModel):
     """Structured result from the audio analysis agent."""
@@ -386,6 +471,43 @@ class SafetyEthicsResult(BaseModel):
         populate_by_name = True
 
 
+class VideoReviewRequest(BaseModel):
+    """
+    Request payload for running the overall critic and safety and ethics
+    agents together on one video.
+
+    Attributes:
+        video_base64: Base64-encoded content of the generated advertisement
+            video. Data-URI prefixes are accepted and will be stripped
+            automatically prior to processing.
+        brand_context: Additional brand information shared by both agents.
+    """
+
+    video_base64: str = Field(..., alias="videoBase64")
+    brand_context: BrandContext = Field(..., alias="brandContext")
+
+    class Config:
+        populate_by_name = True
+
+    @validator("video_base64")
+    def validate_video(cls, value: str) -> str:
+        if not value:
+            raise ValueError("video_base64 must not be empty")
+        if len(value) < 100:
+            raise ValueError("video_base64 payload appears to be too small")
+        return value
+
+
+class VideoReviewResult(BaseModel):
+    """Results of the overall critic and safety and ethics agents."""
+
+    overall_critic: OverallCriticResult = Field(..., alias="overallCritic")
+    safety_ethics: SafetyEthicsResult = Field(..., alias="safetyEthics")
+
+    class Config:
+        populate_by_name = True
+
+
 class MessageClarityRequest(BaseModel):
     """
     Request payload expected by the message clarity agent.
@@ -449,6 +571,39 @@ class AdvisorRequest(BaseModel):
         populate_by_name = True
 
 
+class AdvisorScoreJustifications(BaseModel):
+    """Per-score justifications in the advisor report."""
+
+    brand_alignment: str = Field(..., alias="brandAlignment")
+    visual_quality: str = Field(..., alias="visualQuality")
+    tone_accuracy: str = Field(..., alias="toneAccuracy")
+
+    class Config:
+        populate_by_name = True
+
+
+class AdvisorReport(BaseModel):
+    """Response schema Gemini fills in for the advisor agent."""
+
+    brand_alignment: float = Field(..., alias="brandAlignment")
+    visual_quality: float = Field(..., alias="visualQuality")
+    tone_accuracy: float = Field(..., alias="toneAccuracy")
+    violations: List[str]
+    off_brand_elements: List[str] = Field(..., alias="offBrandElements")
+    comprehensive_report: str = Field(..., alias="comprehensiveReport")
+    justifications: AdvisorScoreJustifications
+    validation_prompt: str = Field(..., alias="validationPrompt")
+
+    class Config:
+        populate_by_name = True
+
+
+class AdvisorBatchReport(AdvisorReport):
+    """Advisor report tagged with the id of the ad it belongs to."""
+
+    id: int
+
+
 class AdvisorResult(BaseModel):
     """Structured result returned by the advisor agent."""
     
@@ -461,6 +616,28 @@ class AdvisorResult(BaseModel):
         populate_by_name = True
 
 
+class AdvisorBatchRequest(BaseModel):
+    """
+    Request payload for running the advisor agent over several ads at once.
+
+    Attributes:
+        requests: Individual advisor requests, one per ad
+        batch_size: Maximum number of ads marshalled into a single Gemini call
+    """
+
+    requests: List[AdvisorRequest] = Field(..., min_length=1)
+    batch_size: int = Field(8, alias="batchSize", ge=1, le=20)
+
+    class Config:
+        populate_by_name = True
+
+
+class AdvisorBatchResult(BaseModel):
+    """Advisor results in the same order as the batch request."""
+
+    results: List[AdvisorResult]
+
+
 class AgentErrorResponse(BaseModel):
     """Standardised error payload for agent endpoints."""
 
@@ -2,12 +2,63 @@
 Helper utilities for interacting with the Google GenAI Python SDK.
 """
 
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
 from functools import lru_cache
-from typing import Optional
+from importlib.util import find_spec
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+import httpx
 from google import genai
+from google.genai import types
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speed-up; fall back to stdlib json
+    orjson = None
 
 from ..config import settings
+from .media import Base64VideoReader, strip_data_uri_prefix
+
+logger = logging.getLogger(__name__)
+
+
+# Keep-alive pool shared by every agent so repeated Gemini calls reuse warm
+# TCP/TLS connections instead of handshaking per request.
+_CONNECTION_LIMITS = httpx.Limits(
+    max_connections=50,
+    max_keepalive_connections=20,
+    keepalive_expiry=60.0,
+)
+
+# HTTP/2 multiplexes concurrent agent calls over one connection, but httpx
+# only supports it when the optional ``h2`` package is installed.
+_HTTP2_AVAILABLE = find_spec("h2") is not None
+
+# JSON parser shared by every agent. orjson.JSONDecodeError subclasses
+# json.JSONDecodeError, so callers can keep catching the stdlib exception
+# regardless of which parser is active.
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+# Uploaded videos are reused by content hash so retries and repeated critiques
+# of the same video skip the upload and ACTIVE wait. The Files API keeps
+# uploads for 48 hours; entries expire an hour earlier to stay on the safe side.
+_UPLOAD_CACHE_SIZE = 64
+_UPLOAD_CACHE_TTL_SECONDS = 47 * 60 * 60
+_HASH_CHUNK_CHARS = 1024 * 1024
+
+_upload_cache: "OrderedDict[str, Tuple[types.File, float]]" = OrderedDict()
+_upload_cache_lock = threading.Lock()
+
+
+def _http_client_args() -> Dict[str, Any]:
+    return {"limits": _CONNECTION_LIMITS, "http2": _HTTP2_AVAILABLE}
 
 
 @lru_cache(maxsize=1)
@@ -15,6 +66,9 @@ def get_genai_client(api_key: Optional[str] = None) -> genai.Client:
     """
     Return a cached Google GenAI client.
 
+    The client owns a single pooled HTTP transport, so caching it keeps
+    connections alive across requests.
+
     Args:
         api_key: Optional override for the API key. When omitted the value from
             application settings is used.
@@ -24,4 +78,270 @@ def get_genai_client(api_key: Optional[str] = None) -> genai.Client:
     if not key:
         raise ValueError("GOOGLE_API_KEY is required to call GenAI services")
 
-    return genai.Client(api_key=key)
+    return genai.Client(
+        api_key=key,
+        http_options=types.HttpOptions(
+            client_args=_http_client_args(),
+            async_client_args=_http_client_args(),
+        ),
+    )
+
+
+def extract_response_text(response: types.GenerateContentResponse) -> str:
+    """
+    Attempt to extract the textual payload from a Gemini response.
+
+    ``response.text`` covers the common case; otherwise the candidate parts
+    are walked once and joined. Objects without the expected shape yield "".
+    """
+
+    try:
+        text = response.text
+        if text:
+            return text
+        return "\n".join(
+            part.text
+            for candidate in response.candidates or ()
+            if candidate.content
+            for part in candidate.content.parts or ()
+            if part.text
+        )
+    except AttributeError:
+        return ""
+
+
+def parse_json_payload(text: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Parse JSON from the Gemini response. Returns the parsed dict and warnings.
+    """
+
+    warnings: List[str] = []
+    cleaned = text.strip()
+
+    if not cleaned:
+        warnings.append("Empty response body received from Gemini")
+        return {}, warnings
+
+    # Remove optional Markdown fences (```json ... ```)
+    if cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+        if cleaned[:4].lower() == "json":
+            cleaned = cleaned[4:]
+        cleaned = cleaned.strip()
+        if cleaned.endswith("```"):
+            cleaned = cleaned[:-3].strip()
+
+    # The common case is a bare JSON object, which parses without slicing out
+    # a copy; the brace search is only a fallback
+    if cleaned.startswith("{"):
+        try:
+            return json_loads(cleaned), warnings
+        except json.JSONDecodeError:
+            pass
+
+    json_start = cleaned.find("{")
+    json_end = cleaned.rfind("}", json_start + 1) if json_start != -1 else -1
+    if json_start == -1 or json_end == -1:
+        warnings.append("Gemini response did not contain JSON; returning raw text")
+        return {"rawText": cleaned}, warnings
+
+    json_blob = cleaned[json_start : json_end + 1]
+
+    try:
+        return json_loads(json_blob), warnings
+    except json.JSONDecodeError as exc:
+        warnings.append(f"Failed to parse JSON payload: {exc}")
+        return {"rawText": cleaned}, warnings
+
+
+def dump_json_compact(data: Any, sort_keys: bool = False) -> str:
+    """
+    Serialize ``data`` as compact JSON, e.g. to embed an agent report in a prompt.
+
+    orjson is used when installed; json is the fallback. The model does not
+    need indentation, and the whitespace would only cost input tokens.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(data, option=option).decode()
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, sort_keys=sort_keys)
+
+
+def upload_file_and_wait(
+    client: genai.Client,
+    file: Union[str, io.IOBase],
+    mime_type: str = "video/mp4",
+) -> types.File:
+    """Upload a local file or binary stream to the Gemini Files API and wait until it is ACTIVE."""
+
+    logger.info("Uploading video file to Google GenAI...")
+    uploaded = client.files.upload(file=file, config={"mime_type": mime_type})
+    logger.info("Video uploaded, URI: %s", uploaded.uri if hasattr(uploaded, "uri") else "N/A")
+
+    # Small files are often ACTIVE as soon as the upload returns
+    if "ACTIVE" in str(getattr(uploaded, "state", None) or "").upper():
+        logger.debug("File %s already ACTIVE on upload", uploaded.name)
+    else:
+        wait_for_file_active(client, uploaded)
+    return uploaded
+
+
+def _payload_digest(data: str) -> str:
+    hasher = hashlib.sha256()
+    # Hash in slices to avoid encoding the whole payload into a second buffer
+    for offset in range(0, len(data), _HASH_CHUNK_CHARS):
+        hasher.update(data[offset : offset + _HASH_CHUNK_CHARS].encode("ascii", "replace"))
+    return hasher.hexdigest()
+
+
+def _get_cached_upload(client: genai.Client, key: str) -> Optional[types.File]:
+    with _upload_cache_lock:
+        entry = _upload_cache.get(key)
+        if entry is None:
+            return None
+        uploaded, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del _upload_cache[key]
+            return None
+        _upload_cache.move_to_end(key)
+
+    # The file may have been deleted remotely; confirm it is still usable
+    try:
+        file_info = client.files.get(name=uploaded.name)
+    except Exception as exc:  # noqa: BLE001
+        logger.debug("Cached upload %s is no longer available: %s", uploaded.name, exc)
+        file_info = None
+
+    if file_info is None or "ACTIVE" not in str(getattr(file_info, "state", "")).upper():
+        with _upload_cache_lock:
+            _upload_cache.pop(key, None)
+        return None
+
+    return uploaded
+
+
+def upload_base64_video(client: genai.Client, data: str) -> types.File:
+    """
+    Upload a base64 video payload (optionally with data URI prefix) and wait
+    until it is ACTIVE, reusing an earlier upload of the same video if one is
+    still available.
+    """
+
+    key = _payload_digest(strip_data_uri_prefix(data))
+
+    cached = _get_cached_upload(client, key)
+    if cached is not None:
+        logger.info("Reusing uploaded video %s", cached.name)
+        return cached
+
+    # The SDK uploads file-like objects in chunks, so the video streams
+    # straight from the base64 payload without a temporary file
+    uploaded = upload_file_and_wait(client, Base64VideoReader(data))
+
+    with _upload_cache_lock:
+        _upload_cache[key] = (uploaded, time.monotonic() + _UPLOAD_CACHE_TTL_SECONDS)
+        _upload_cache.move_to_end(key)
+        while len(_upload_cache) > _UPLOAD_CACHE_SIZE:
+            _upload_cache.popitem(last=False)
+
+    return uploaded
+
+
+def _file_name_from_name(name: str) -> str:
+    # Ensure it starts with "files/" if it's just an ID
+    return name if name.startswith("files/") else f"files/{name}"
+
+
+def _file_name_from_uri(uri: str) -> str:
+    return f"files/{uri.split('/files/')[-1]}" if "/files/" in uri else uri
+
+
+# Ways to derive the Files API name from an upload response, in order of preference
+_FILE_NAME_EXTRACTORS: Tuple[Tuple[str, Callable[[str], str]], ...] = (
+    ("name", _file_name_from_name),
+    ("uri", _file_name_from_uri),
+)
+
+
+def wait_for_file_active(client: genai.Client, file_obj: Any, max_wait_seconds: int = 120) -> None:
+    """
+    Wait for an uploaded file to become ACTIVE before using it.
+
+    Args:
+        client: Google GenAI client instance
+        file_obj: File object returned from upload
+        max_wait_seconds: Maximum time to wait in seconds
+
+    Raises:
+        TimeoutError: If file doesn't become ACTIVE within max_wait_seconds
+    """
+    start_time = time.monotonic()
+    # Back off exponentially from 100 ms so files that activate quickly are
+    # noticed quickly, without polling faster than every 2 s for slow ones
+    poll_interval = 0.1
+    max_poll_interval = 2.0
+
+    # Get file name (the get() method uses 'name' parameter, format: "files/...")
+    file_name = None
+    for attr, to_file_name in _FILE_NAME_EXTRACTORS:
+        value = getattr(file_obj, attr, None)
+        if value:
+            file_name = to_file_name(value)
+            break
+
+    if not file_name:
+        logger.warning("Could not determine file name from file object, skipping wait check")
+        # Give it a short delay anyway
+        time.sleep(3)
+        return
+
+    logger.info("Waiting for file %s to become ACTIVE...", file_name)
+
+    while time.monotonic() - start_time < max_wait_seconds:
+        try:
+            # Get current file status using 'name' parameter
+            file_info = client.files.get(name=file_name)
+
+            # Check for state in various possible locations
+            state = None
+
+            # Try direct attribute access
+            if hasattr(file_info, "state"):
+                state = file_info.state
+            elif hasattr(file_info, "status"):
+                state = file_info.status
+
+            # Try accessing via model_dump if it's a Pydantic model
+            if state is None and hasattr(file_info, "model_dump"):
+                file_dict = file_info.model_dump()
+                state = file_dict.get("state") or file_dict.get("status")
+
+            # Check if ACTIVE
+            state_str = str(state) if state else None
+            if state_str and "ACTIVE" in state_str.upper():
+                logger.info("File %s is now ACTIVE", file_name)
+                return
+
+            # Log current state
+            elapsed = int(time.monotonic() - start_time)
+            logger.debug(
+                "File %s state: %s (elapsed: %ds), waiting...",
+                file_name,
+                state_str or "unknown",
+                elapsed,
+            )
+
+        except Exception as exc:
+            elapsed = int(time.monotonic() - start_time)
+            logger.warning(
+                "Error checking file status (elapsed: %ds): %s, continuing...",
+                elapsed,
+                exc,
+            )
+
+        time.sleep(poll_interval)
+        poll_interval = min(poll_interval * 1.5, max_poll_interval)
+
+    raise TimeoutError(
+        f"File {file_name} did not become ACTIVE within {max_wait_seconds} seconds"
+    )
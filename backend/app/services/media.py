@@ -0,0 +1,226 @@
+"""
+Helper utilities for decoding media payloads shared between agents.
+
+Frames and logo crops travel between agents as base64 data URIs, so the same
+image is often decoded several times per workflow run (logo detection, color
+harmony, ...). Decoded images are kept in a small process-wide cache keyed by
+a hash of the payload.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import cv2
+import numpy as np
+
+try:
+    import pybase64 as base64  # type: ignore
+except ImportError:  # pybase64 is an optional SIMD speed-up; fall back to stdlib base64
+    import base64
+
+
+# Longest data URI prefix searched for; media types with parameters still fit
+_DATA_URI_MAX_PREFIX = 256
+
+# Upper bound on the memory held by decoded images (bytes).
+IMAGE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+_image_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_image_cache_bytes = 0
+_image_cache_lock = threading.Lock()
+
+
+def strip_data_uri_prefix(data: str) -> str:
+    """Remove data URI prefixes (``data:<mime>;base64,``) so the payload can be decoded."""
+    if not data:
+        return ""
+    # The base64 alphabet has no commas, so the first comma ends the prefix.
+    # The search is bounded so a payload without one is not scanned in full.
+    idx = data.find(",", 5, _DATA_URI_MAX_PREFIX) if data.startswith("data:") else -1
+    return data[idx + 1:] if idx >= 0 else data
+
+
+def decode_base64_video(data: str, validate: bool = True) -> bytes:
+    """
+    Decode a base64 video payload (optionally with data URI prefix) to bytes.
+
+    With ``validate=False`` characters outside the alphabet are skipped
+    instead of rejected; malformed input still fails on padding. Payloads
+    that are invalid or decode to nothing raise ValueError.
+    """
+    try:
+        decoded = base64.b64decode(strip_data_uri_prefix(data), validate=validate)
+    except ValueError as exc:  # binascii.Error subclasses ValueError
+        raise ValueError("Invalid base64 payload provided for video") from exc
+    if not decoded:
+        raise ValueError("Invalid base64 payload provided for video")
+    return decoded
+
+
+class Base64VideoReader(io.RawIOBase):
+    """
+    Seekable binary stream over a base64 video payload, decoded on demand.
+
+    Each ``read`` decodes only the base64 groups covering the requested
+    range, so a payload can be uploaded without a temporary file and without
+    holding the full decoded video in memory next to its base64 form. Invalid
+    base64 raises ValueError from ``read``.
+    """
+
+    def __init__(self, data: str) -> None:
+        super().__init__()
+        data = strip_data_uri_prefix(data)
+        if len(data) % 4:
+            raise ValueError("Invalid base64 payload provided for video")
+
+        padding = 2 if data.endswith("==") else 1 if data.endswith("=") else 0
+        self._data = data
+        self._size = len(data) // 4 * 3 - padding
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._pos + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._pos = position
+        return position
+
+    def read(self, size: int = -1) -> bytes:
+        end = self._size if size is None or size < 0 else min(self._pos + size, self._size)
+        if end <= self._pos:
+            return b""
+
+        # Decode whole 4-character groups (3 bytes each) covering the range
+        first_group = self._pos // 3
+        last_group = -(-end // 3)
+        try:
+            decoded = base64.b64decode(
+                self._data[first_group * 4 : last_group * 4], validate=True
+            )
+        except ValueError as exc:  # binascii.Error subclasses ValueError
+            raise ValueError("Invalid base64 payload provided for video") from exc
+
+        skip = self._pos - first_group * 3
+        chunk = decoded[skip : skip + end - self._pos]
+        self._pos = end
+        return chunk
+
+    def readinto(self, buffer) -> int:  # type: ignore[override]
+        chunk = self.read(len(buffer))
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+
+class Base64DataUriWriter(io.RawIOBase):
+    """
+    Writable binary stream that base64-encodes its input into a data URI.
+
+    Bytes are encoded as they are written, in whole 3-byte groups, so a
+    download can be streamed straight into its base64 form without first
+    holding the raw file in memory.
+    """
+
+    def __init__(self, mime_type: str) -> None:
+        super().__init__()
+        self._out = bytearray(f"data:{mime_type};base64,".encode("ascii"))
+        self._pending = b""
+        self.bytes_written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[override]
+        # Count and slice bytes, not items, for buffers with wider formats
+        view = memoryview(data).cast("B")
+        chunk = self._pending + view.tobytes() if self._pending else view
+        usable = len(chunk) - len(chunk) % 3
+        self._out += base64.b64encode(memoryview(chunk)[:usable])
+        self._pending = bytes(chunk[usable:])
+        self.bytes_written += view.nbytes
+        return view.nbytes
+
+    def getvalue(self) -> str:
+        """Return the data URI for everything written so far."""
+        return (self._out + base64.b64encode(self._pending)).decode("ascii")
+
+
+def _cache_get(key: bytes) -> Optional[np.ndarray]:
+    with _image_cache_lock:
+        image = _image_cache.get(key)
+        if image is not None:
+            _image_cache.move_to_end(key)
+        return image
+
+
+def _cache_put(key: bytes, image: np.ndarray) -> None:
+    global _image_cache_bytes
+
+    if image.nbytes > IMAGE_CACHE_MAX_BYTES:
+        return
+
+    with _image_cache_lock:
+        if key in _image_cache:
+            return
+        _image_cache[key] = image
+        _image_cache_bytes += image.nbytes
+        while _image_cache_bytes > IMAGE_CACHE_MAX_BYTES:
+            _, evicted = _image_cache.popitem(last=False)
+            _image_cache_bytes -= evicted.nbytes
+
+
+def decode_base64_image(data: str, color: bool = True) -> np.ndarray:
+    """
+    Decode a base64 image (optionally with data URI prefix) into a numpy array.
+
+    Images are decoded to BGR, or straight to a single-channel grayscale array
+    when ``color`` is False (the JPEG decoder then skips colour conversion).
+
+    Results are cached, so the returned array is read-only and shared between
+    callers; copy it before modifying it in place.
+    """
+    stripped = strip_data_uri_prefix(data)
+    if not stripped:
+        raise ValueError("Empty base64 image payload")
+
+    key = hashlib.blake2b(stripped.encode("ascii", "replace"), digest_size=16).digest()
+    if not color:
+        key += b"gray"
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        image_bytes = base64.b64decode(stripped, validate=False)
+    except ValueError as exc:  # binascii.Error subclasses ValueError
+        raise ValueError("Invalid base64 image payload") from exc
+
+    np_arr = np.frombuffer(image_bytes, dtype=np.uint8)
+    image = cv2.imdecode(np_arr, cv2.IMREAD_COLOR if color else cv2.IMREAD_GRAYSCALE)
+
+    if image is None:
+        raise ValueError("Failed to decode image from base64 payload")
+
+    image.setflags(write=False)
+    _cache_put(key, image)
+    return image
@@ -0,0 +1,85 @@
+"""
+Export the CLIP image encoder used by the logo detector to ONNX.
+
+The exported model takes CLIP-normalised ``pixel_values`` (N, 3, 224, 224)
+with a dynamic batch axis and returns ``image_embeds``. Point the backend at
+it with ``CLIP_ONNX_MODEL_PATH`` to run CLIP scoring through ONNX Runtime
+instead of PyTorch.
+
+Usage:
+    python scripts/export_clip_onnx.py --output clip_vision_fp16.onnx --fp16
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+
+import torch
+from transformers import CLIPModel
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MODEL_NAME = "openai/clip-vit-base-patch32"
+
+
+class _ImageEncoder(torch.nn.Module):
+    """Wrap ``CLIPModel.get_image_features`` so it can be traced on its own."""
+
+    def __init__(self, model: CLIPModel) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.model.get_image_features(pixel_values=pixel_values)
+
+
+def export(model_name: str, output: str, fp16: bool, opset: int) -> None:
+    """Export the CLIP image encoder to ``output``."""
+
+    model = CLIPModel.from_pretrained(model_name).eval()
+    encoder = _ImageEncoder(model)
+
+    image_size = model.config.vision_config.image_size
+    dummy = torch.zeros(1, 3, image_size, image_size)
+
+    with torch.inference_mode():
+        torch.onnx.export(
+            encoder,
+            (dummy,),
+            output,
+            input_names=["pixel_values"],
+            output_names=["image_embeds"],
+            dynamic_axes={
+                "pixel_values": {0: "batch"},
+                "image_embeds": {0: "batch"},
+            },
+            opset_version=opset,
+        )
+
+    if fp16:
+        # Convert after export so tracing stays on CPU in FP32
+        import onnx
+        from onnxconverter_common import float16
+
+        onnx_model = float16.convert_float_to_float16(onnx.load(output))
+        onnx.save(onnx_model, output)
+
+    logger.info("Exported %s image encoder to %s (fp16=%s)", model_name, output, fp16)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME, help="Hugging Face model name")
+    parser.add_argument("--output", default="clip_vision_fp16.onnx", help="Output .onnx path")
+    parser.add_argument("--fp16", action="store_true", help="Store weights in FP16")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    export(args.model, args.output, args.fp16, args.opset)
+
+
+if __name__ == "__main__":
+    main()